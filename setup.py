@@ -15,6 +15,8 @@ setup(
                     "CSS format"),
     install_requires=[
         "nordb",
+        "numpy",
+        "psycopg2",
         "pyproj"
     ],
     long_description=open("README.md").read(),
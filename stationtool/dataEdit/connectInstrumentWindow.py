@@ -5,6 +5,7 @@ from dataEdit.dataEditWindow import DataEditWindow
 from dataEdit.dataEditField import (FloatEditField, IntegerEditField, StringEditField,
                                     ChoiceEditField, DateEditField, DatetimeEditField,
                                     CheckBoxFields)
+import time
 from datetime import datetime
 
 class ConnectInstrumentWindow(DataEditWindow):
@@ -21,10 +22,10 @@ class ConnectInstrumentWindow(DataEditWindow):
     CALRATIO = 7
     CALPER = 8
 
-    def __init__(self, sitechan_storage_model, sensor_storage_model, database_api, calratio, calper, instrument_id):
+    def __init__(self, sitechan_storage_model, sensor_storage_model, database_api, database_worker, calratio, calper, instrument_id):
         self.database_api = database_api
         self.fields = [
-            ChoiceEditField(self, "Station Code", "Station code to which this instrument will be attached to", self.database_api.getStationCodes()),
+            ChoiceEditField(self, "Station Code", "Station code to which this instrument will be attached to", []),
             CheckBoxFields(self, "Channels", "Channels that will be created", ["N", "E", "Z"]),
             DatetimeEditField(self, "On Datetime", "Datetime when this instrument was set up"),
             FloatEditField(self, "Emplacement Depth", "Depth of this instrument in the relation of the elevation of the station in meters", -100.0, 100.0),
@@ -38,14 +39,15 @@ class ConnectInstrumentWindow(DataEditWindow):
         self.sitechan_storage_model = sitechan_storage_model
         self.sensor_storage_model = sensor_storage_model
         DataEditWindow.__init__(self, 'Connect Instrument', None, self.fields)
+        database_worker.submit('station-codes', self.database_api.getStationCodes, callback = self.fields[self.STATION_CODE].setChoices)
 
     def pushToStorage(self):
         """
         Overridden method for pushing content to storage
         """
-        for c_code in self.fields[self.CHANNEL_CODES].getValue():
-            self.sitechan_storage_model.insertNewDataRow(self.getSitechanDataFromFields(c_code))
-            self.sensor_storage_model.insertNewDataRow(self.getSensorDataFromFields(c_code))
+        channel_codes = self.fields[self.CHANNEL_CODES].getValue()
+        self.sitechan_storage_model.insertDataRows([self.getSitechanDataFromFields(c_code) for c_code in channel_codes])
+        self.sensor_storage_model.insertDataRows([self.getSensorDataFromFields(c_code) for c_code in channel_codes])
         self.exitWindow()
 
     def getSitechanDataFromFields(self, c_code):
@@ -87,11 +89,11 @@ class ConnectInstrumentWindow(DataEditWindow):
             -1,
             self.fields[self.STATION_CODE].getValue(),
             c_code,
-            self.fields[self.ON_DATETIME].getValue().timetuple(),
+            time.mktime(self.fields[self.ON_DATETIME].getValue().timetuple()),
             9999999999.999,
             self.fields[self.CALRATIO].getValue(),
             self.fields[self.CALPER].getValue(),
-            self.fields[self.TSHIFT].getValue(),
+            float(self.fields[self.TSHIFT].getValue()),
             self.fields[self.INSTANT].getValue(),
             datetime.now()
         ]
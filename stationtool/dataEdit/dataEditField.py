@@ -172,7 +172,7 @@ class ResponseEditField(DataEditField):
     """
     Field for picking up a response file
     """
-    def __init__(self, parent, title, help_text, database_api):
+    def __init__(self, parent, title, help_text, database_api, database_worker):
         self.field = QLineEdit()
         self.field.setReadOnly(True)
 
@@ -184,6 +184,7 @@ class ResponseEditField(DataEditField):
 
         self.response = None
         self.database_api = database_api
+        self.database_worker = database_worker
 
         self.layout.addWidget(self.file_button)
         self.layout.addWidget(self.db_button)
@@ -221,7 +222,7 @@ class ResponseEditField(DataEditField):
         """
         Function for reading the response from the database
         """
-        self.widget = ResponseFilePicker(self, self.database_api)
+        self.widget = ResponseFilePicker(self, self.database_api, self.database_worker)
         self.widget.show()
 
     def clearField(self):
@@ -334,6 +335,14 @@ class ChoiceEditField(DataEditField):
         """
         self.field.setCurrentIndex(0)
 
+    def setChoices(self, choices):
+        """
+        Replace the choices of the choice edit field
+        """
+        self.field.clear()
+        for c in choices:
+            self.field.addItem(c)
+
     def getValue(self):
         """
         Get the value of ChoiceEditField
@@ -344,21 +353,22 @@ class ResponseFilePicker(QWidget):
     """
     Window to picking a response from database
     """
-    def __init__(self, response_edit, database_api):
+    def __init__(self, response_edit, database_api, database_worker):
         super().__init__()
         self.response_edit = response_edit
         self.database_api = database_api
+        self.database_worker = database_worker
         self.setWindowTitle("Pick a response from database")
 
         self.response_label = QLabel('Response', self)
-        self.response_names = set([ins.dfile for ins in self.database_api.getInstruments()])
+        self.response_names = []
         self.response_box = QComboBox(self)
-        self.response_box.addItems(self.response_names)
 
         self.cancel_btn = QPushButton('Cancel', self)
         self.cancel_btn.clicked.connect(self.pressCancel)
         self.add_btn = QPushButton('Add', self)
         self.add_btn.clicked.connect(self.pressAdd)
+        self.add_btn.setEnabled(False)
 
         self.layout = QGridLayout(self)
         self.layout.addWidget(self.response_label, 0, 0)
@@ -368,6 +378,16 @@ class ResponseFilePicker(QWidget):
 
         self.setLayout(self.layout)
 
+        self.database_worker.submit('response-dfiles', self.database_api.getDfiles, callback = self.setResponseNames)
+
+    def setResponseNames(self, dfiles):
+        """
+        Fill the response box with the dfiles read from the database
+        """
+        self.response_names = sorted(dfile for dfile in dfiles if dfile is not None)
+        self.response_box.addItems(self.response_names)
+        self.add_btn.setEnabled(True)
+
     def pressCancel(self):
         """
         Cancel button is pressed
@@ -378,7 +398,15 @@ class ResponseFilePicker(QWidget):
         """
         Add button is pressed
         """
-        for ins in self.database_api.getInstruments():
-            if ins.dfile == self.response_box.currentText():
-                self.response_edit.setResponse(ins.response)
-                self.close()
+        self.add_btn.setEnabled(False)
+        self.database_worker.submit('response-by-dfile', self.database_api.getResponseByDfile,
+                                    (self.response_box.currentText(),), self.useResponse, interactive = True)
+
+    def useResponse(self, response):
+        """
+        Set the response read from the database to the response edit field
+        """
+        self.add_btn.setEnabled(True)
+        if response is not None:
+            self.response_edit.setResponse(response)
+            self.close()
@@ -23,7 +23,7 @@ class NewInstrumentWindow(DataEditWindow):
     NCALPER = 6
     RESPONSE_FILE = 7
 
-    def __init__(self, storage_model, database_api):
+    def __init__(self, storage_model, database_api, database_worker):
         self.database_api = database_api
         self.fields = [
             StringEditField(self, "Instrument name", "Name of the instrument", 50),
@@ -33,7 +33,7 @@ class NewInstrumentWindow(DataEditWindow):
             FloatEditField(self, "Samplerate", "Default samplerate of the instrument", min_val = 10.0, max_val = 2000.0, decimals = 3, default_val = 200.0),
             FloatEditField(self, "Instrument nominal calibration", "Nominal calibration (nn/count) of the instrument", min_val = 0.0, max_val = 10000.0, decimals = 7),
             FloatEditField(self, 'Instrument calibration period', "Nominal calibration period (sec)", min_val = 0.0, max_val = 100.0, decimals = 6, default_val = 0.5),
-            ResponseEditField(self, "Response file", "Response file of the instrument. You can either load a new response to the database or use an existing one as your response file.", database_api)
+            ResponseEditField(self, "Response file", "Response file of the instrument. You can either load a new response to the database or use an existing one as your response file.", database_api, database_worker)
         ]
         DataEditWindow.__init__(self, 'New Instrument', storage_model, self.fields)
 
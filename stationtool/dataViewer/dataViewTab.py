@@ -4,28 +4,48 @@ This module contains the information for a abstract DataViewTab.
 from operator import itemgetter
 from datetime import date
 
-from PyQt5.QtWidgets import (QWidget, QTableView, QVBoxLayout, QHBoxLayout, QApplication, QFileDialog)
-from PyQt5.QtCore import QAbstractTableModel, QVariant, Qt, QSortFilterProxyModel
+from PyQt5.QtWidgets import (QWidget, QTableView, QVBoxLayout, QHBoxLayout, QApplication, QFileDialog,
+                             QComboBox, QLineEdit)
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QVariant, Qt, QSortFilterProxyModel
 from PyQt5.QtGui import QColor, QBrush
 
-from other.utils import convertValue
+import numpy as np
+
+from other.utils import convertValue, date2String
+from other.columnarTable import ColumnarTable
+from other.textIndex import TextIndex, parseRange
+
+NO_DATA = QVariant()
 
 class StationToolTableModel(QAbstractTableModel):
     """
     Class inheriting QAbstractTableModel for handling table operations for the DataViewTab objects table_view object.
     """
+    MAX_SORT_COLUMNS = 3
+    FILTER_PREFIX = 'prefix'
+    FILTER_CONTAINS = 'contains'
+
     def __init__(self, parent, header, data, editable = False):
         QAbstractTableModel.__init__(self, parent)
         self.header_data = [h[0] for h in header]
         self.header_types = [h[1] for h in header]
-        self.array_data = data
+        self.array_data = ColumnarTable(self.header_types, data,
+                                        dict((i, date2String) for i, t in enumerate(self.header_types) if issubclass(t, date)))
         self.editable = editable
+        self.selected_id_set = frozenset()
+        self.sort_columns = [(0, False)]
+        self.selected_brush = QBrush(QColor('white'))
+        self.unselected_brush = QBrush(QColor('lightGray'))
+        self.filter_columns = []
+        self.text_index = None
 
     def removeSelectedFromTable(self, index):
         """
         Remove selected row from table
         """
         if index != -1 or index >= len(self.array_data):
+            if self.text_index is not None:
+                self.text_index.removeRow(self.array_data.getValue(index, 0))
             del self.array_data[index]
             self.layoutChanged.emit()
 
@@ -57,10 +77,13 @@ class StationToolTableModel(QAbstractTableModel):
         if self.editable and index.isValid():
             data_value = convertValue(value, self.header_types[index.column()])
             if data_value is not None:
+                old_id = self.array_data.getValue(index.row(), 0)
                 try:
-                    self.array_data[index.row()][index.column()] = data_value
+                    self.array_data.setValue(index.row(), index.column(), data_value)
                 except:
                     return False
+                if self.text_index is not None:
+                    self.text_index.updateRow(old_id, self.array_data.getRow(index.row()))
                 self.parent().resizeAll()
                 self.layoutChanged.emit()
                 return True
@@ -72,15 +95,13 @@ class StationToolTableModel(QAbstractTableModel):
         """
         if index.isValid():
             if role == Qt.BackgroundRole:
-                if self.array_data[index.row()][0] not in self.getSelectedIds() and len(self.getSelectedIds()) != 0:
-                    return QVariant(QBrush(QColor('lightGray')))
+                if self.selected_id_set and self.array_data.getValue(index.row(), 0) not in self.selected_id_set:
+                    return self.unselected_brush
                 else:
-                    return QVariant(QBrush(QColor('white')))
+                    return self.selected_brush
             if role == Qt.DisplayRole:
-                if isinstance(self.array_data[index.row()][index.column()], date):
-                    return QVariant(self.array_data[index.row()][index.column()].strftime("%d/%m/%Y"))
-                return QVariant(self.array_data[index.row()][index.column()])
-        return QVariant()
+                return self.array_data.getDisplayValue(index.row(), index.column())
+        return NO_DATA
 
     def headerData(self, col, orientation, role):
         """
@@ -96,66 +117,111 @@ class StationToolTableModel(QAbstractTableModel):
         """
         raise Exception("Do not use this function but override it in the child objects!")
 
+    def updateSelectionMask(self):
+        """
+        Function for refreshing the set of selected ids used when painting and sorting the rows. Call this when the selection changes.
+        """
+        self.selected_id_set = frozenset(self.getSelectedIds())
+
     def updateTab(self):
         """
-        Function for updating the this tab
+        Function for updating the this tab after the selection has changed. Only the background of the rows whose selection state changed is repainted and the rows are not moved.
+        """
+        old_ids = self.selected_id_set
+        self.updateSelectionMask()
+        new_ids = self.selected_id_set
+
+        if old_ids == new_ids or len(self.array_data) == 0:
+            return
+
+        if bool(old_ids) != bool(new_ids):
+            self.emitBackgroundChanged(0, len(self.array_data) - 1)
+            return
+
+        rows = np.flatnonzero(self.array_data.selectionMask(old_ids ^ new_ids))
+        if len(rows) == 0:
+            return
+
+        breaks = np.flatnonzero(np.diff(rows) != 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]]))
+
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            self.emitBackgroundChanged(start, end)
+
+    def emitBackgroundChanged(self, first_row, last_row):
+        """
+        Function for notifying the views that the background of rows from first_row to last_row has changed
+        """
+        self.dataChanged.emit(self.index(first_row, 0), self.index(last_row, len(self.header_data) - 1), [Qt.BackgroundRole])
+
+    def regroupTab(self):
+        """
+        Function for updating a tab that has been hidden while the selection changed. The rows are regrouped with the selected rows first in the order of the last sort, without sorting again.
         """
         self.layoutAboutToBeChanged.emit()
+        self.updateSelectionMask()
+        self.array_data.groupRows(self.selected_id_set)
         self.layoutChanged.emit()
 
     def sort(self, col, order = Qt.AscendingOrder):
         """
-        Function for sorting a column.
+        Function for sorting a column. The column becomes the primary sort key and the previously sorted columns break ties. Selected rows are placed first and empty values last.
         """
-        self.layoutAboutToBeChanged.emit()
-
-        chosen = []
-        not_chosen = []
-        chosen_ids = self.getSelectedIds()
+        descending = order != Qt.AscendingOrder
+        self.sort_columns = [(col, descending)] + [s for s in self.sort_columns if s[0] != col][:self.MAX_SORT_COLUMNS - 1]
 
-        for data in self.array_data:
-            if data[0] in chosen_ids:
-                chosen.append(data)
-            else:
-                not_chosen.append(data)
-
-        if self.header_types[col] is str:
-            chosen.sort(key=lambda x: x[col] or '')
-            not_chosen.sort(key=lambda x: x[col] or '')
-        elif self.header_types[col] is float:
-            chosen.sort(key=lambda x: x[col] or -99999999999.999)
-            not_chosen.sort(key=lambda x: x[col] or -99999999999.999)
-        elif self.header_types[col] is int:
-            chosen.sort(key=lambda x: x[col] or -99999999999)
-            not_chosen.sort(key=lambda x: x[col] or -99999999999)
-        elif self.header_types[col] is date:
-            chosen.sort(key=lambda x: x[col] or date(1900,1,1))
-            not_chosen.sort(key=lambda x: x[col] or date(1900,1,1))
-        elif self.header_types[col] is datetime:
-            chosen.sort(key=lambda x: x[col] or datetime(1900,1,1))
-            not_chosen.sort(key=lambda x: x[col] or datetime(1900,1,1))
-
-        if order != Qt.AscendingOrder:
-            chosen.reverse()
-            not_chosen.reverse()
-
-        self.array_data = chosen + not_chosen
+        self.layoutAboutToBeChanged.emit()
+        self.updateSelectionMask()
+        self.array_data.sortRows(self.sort_columns, self.selected_id_set)
+        self.layoutChanged.emit()
 
+    def resort(self):
+        """
+        Function for sorting the table again with the current sort columns, for example after new rows have been loaded.
+        """
+        self.layoutAboutToBeChanged.emit()
+        self.updateSelectionMask()
+        self.array_data.sortRows(self.sort_columns, self.selected_id_set)
         self.layoutChanged.emit()
 
     def insertNewDataRow(self, data):
         """
         Function for inserting a new row to the table.
         """
-        if len(data) != len(self.header_data):
-            raise Exception("Data array not of right length: expected {0} received {1}".format(len(self.header_data), len(data)))
+        return self.insertDataRows([data])
 
-        for i in range (0, len(data)):
-            if not isinstance(data[i], self.header_types[i]) and data[i] is not None:
-                raise Exception("Data not of right type: expected {0} received {1}".format(self.header_types[i], type(data[i])))
+    def validateDataRows(self, rows):
+        """
+        Function for checking that every row has the right length and every column the right type
+        """
+        for data in rows:
+            if len(data) != len(self.header_data):
+                raise Exception("Data array not of right length: expected {0} received {1}".format(len(self.header_data), len(data)))
+
+        for i in range(len(self.header_data)):
+            header_type = self.header_types[i]
+            for data in rows:
+                if data[i] is not None and not isinstance(data[i], header_type):
+                    raise Exception("Data not of right type: expected {0} received {1}".format(header_type, type(data[i])))
+
+    def insertDataRows(self, rows):
+        """
+        Function for inserting many rows to the end of the table at once. The rows are validated together, the views are notified with a single row insertion and the columns are resized once.
+        """
+        rows = [list(data) for data in rows]
+        if not rows:
+            return True
+
+        self.validateDataRows(rows)
+
+        first = len(self.array_data)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.array_data.extend(rows)
+        if self.text_index is not None:
+            self.text_index.addRows(rows)
+        self.endInsertRows()
 
-        self.array_data.append(data)
-        self.layoutChanged.emit()
         self.parent().resizeAll()
         return True
 
@@ -163,24 +229,251 @@ class StationToolTableModel(QAbstractTableModel):
         """
         Function for clearing all Data from model
         """
-        self.array_data = []
+        self.beginResetModel()
+        self.array_data.clear()
+        if self.text_index is not None:
+            self.text_index.clear()
+        self.endResetModel()
+
+    def setColumnFormatter(self, col, formatter):
+        """
+        Function for showing the values of column col as the strings returned by formatter. The strings are cached and formatted again only when a value changes.
+        """
+        self.layoutAboutToBeChanged.emit()
+        self.array_data.setFormatter(col, formatter)
         self.layoutChanged.emit()
 
+    def isNumericColumn(self, col):
+        """
+        Function for checking if column col holds numbers that are filtered by range
+        """
+        return self.header_types[col] in (int, float)
+
+    def enableTextIndex(self, text_columns):
+        """
+        Function for indexing text_columns and the numeric columns of the table so that its rows can be filtered with findRows
+        """
+        self.filter_columns = list(text_columns)
+        self.text_index = TextIndex(self.filter_columns, [i for i in range(len(self.header_types)) if self.isNumericColumn(i)])
+        self.text_index.addRows(self.array_data)
+
+    def findRows(self, col, mode, text):
+        """
+        Function for getting the ids of the rows matching a filter. Text columns are matched by prefix or substring depending on mode and numeric columns by a range parsed with parseRange. A col of None matches against all indexed text columns. Returns None if text is empty and the table should not be filtered.
+        """
+        text = text.strip()
+        if not text:
+            return None
+        if self.text_index is None:
+            raise Exception("ERROR: Table has no text index, call enableTextIndex first")
+
+        if col is not None and self.isNumericColumn(col):
+            try:
+                low, high = parseRange(text)
+            except ValueError:
+                return set()
+            return self.text_index.inRange(col, low, high)
+
+        if mode == self.FILTER_PREFIX:
+            return self.text_index.prefix(col, text)
+        return self.text_index.contains(col, text)
+
 class AbstractDatabaseTableModel(StationToolTableModel):
     """
     Class for handling database table models. All data in this model will be fetched from the database. This data can be modified in some ways. This class needs to be extended on because of how the different database models function in the database.
     """
-    def __init__(self, parent, header, data, database_api):
+    def __init__(self, parent, header, data, database_api, database_worker):
         StationToolTableModel.__init__(self, parent, header, data, False)
         self.database_api = database_api
-        self.fetchDataFromDB()
+        self.database_worker = database_worker
+        self.loaded = False
+
+    def ensureLoaded(self):
+        """
+        Function for fetching the data of the model the first time it is needed
+        """
+        if not self.loaded:
+            self.loaded = True
+            self.fetchDataFromDB()
 
     def fetchDataFromDB(self):
         """
-        Function for fetching all relevant data from the database and giving them to the DatabaseTableModel. Redefine this to first clear the existing table and then fetch all data from the database_api.
+        Function for fetching all relevant data from the database and giving them to the DatabaseTableModel. Redefine this to request the data from the database_api through the database_worker and fill the table when the result arrives.
         """
         raise Exception("Do not use AbstractDatabaseTableModel but inherit it to your own class")
 
+    def refreshDataFromDB(self):
+        """
+        Function for bringing the model up to date after the database has been modified. Override this with an incremental refresh, by default the whole table is fetched again.
+        """
+        self.fetchDataFromDB()
+
+    def getSyncWatermark(self, objects, id_attr, date_attr):
+        """
+        Function for getting the largest id and load date of objects. These are used as the watermark of the last sync with the database.
+        """
+        ids = [getattr(obj, id_attr) for obj in objects if getattr(obj, id_attr) is not None]
+        dates = [getattr(obj, date_attr) for obj in objects if getattr(obj, date_attr) is not None]
+
+        return max(ids, default = -1), max(dates, default = None)
+
+    def mergeDataRows(self, rows):
+        """
+        Function for merging rows into the table. Rows are validated and de-duplicated by id first. A row replaces the existing row with the same id, other rows are appended and the table is sorted again.
+        """
+        rows = list(dict((row[0], list(row)) for row in rows).values())
+        if not rows:
+            return
+
+        self.validateDataRows(rows)
+
+        row_index = dict((row_id, i) for i, row_id in enumerate(self.array_data.getIds()))
+        new_rows = []
+
+        self.layoutAboutToBeChanged.emit()
+        for row in rows:
+            if row[0] in row_index:
+                self.array_data[row_index[row[0]]] = row
+                if self.text_index is not None:
+                    self.text_index.updateRow(row[0], row)
+            else:
+                new_rows.append(row)
+        self.layoutChanged.emit()
+
+        if len(new_rows) != len(rows):
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.array_data) - 1, len(self.header_data) - 1))
+
+        self.insertDataRows(new_rows)
+        self.resort()
+
+class PagedDatabaseTableModel(AbstractDatabaseTableModel):
+    """
+    Class for database table models that load their rows one page at a time as the view is scrolled. Pages are read with a keyset paginated query, sorting is done with ORDER BY and filtering with WHERE in the database, so only the rows the user has scrolled to are held in the model. Inherit this and redefine fetchPage.
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, header, data, database_api, database_worker):
+        AbstractDatabaseTableModel.__init__(self, parent, header, data, database_api, database_worker)
+        self.filters = []
+        self.last_key = None
+        self.has_more = True
+        self.fetching = False
+
+    def fetchPage(self, order_column, descending, after, limit, filters):
+        """
+        Function for reading one page of rows from the database. Redefine this to call the keyset paginated query of the database_api. Runs in the database_worker.
+        """
+        raise Exception("Do not use PagedDatabaseTableModel but inherit it to your own class")
+
+    def fetchDataFromDB(self):
+        """
+        Function for emptying the table and loading its first page with the current sort and filters
+        """
+        self.clearModelData()
+        self.last_key = None
+        self.has_more = True
+        self.fetching = False
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent):
+        """
+        Function for telling the view whether there are more rows in the database
+        """
+        if parent.isValid():
+            return False
+        return self.loaded and self.has_more
+
+    def fetchMore(self, parent):
+        """
+        Function for requesting the next page of rows. Only one page is requested at a time.
+        """
+        if parent.isValid() or self.fetching or not self.has_more:
+            return
+
+        self.fetching = True
+        col, descending = self.sort_columns[0]
+        self.database_worker.submit('fetch-page-{0}'.format(id(self)), self.fetchPage,
+                                    (col, descending, self.last_key, self.PAGE_SIZE, list(self.filters)),
+                                    callback = self.addPage, error_callback = self.pageFailed)
+
+    def addPage(self, rows):
+        """
+        Function for appending a page of rows read from the database
+        """
+        self.fetching = False
+        self.has_more = len(rows) == self.PAGE_SIZE
+
+        if rows:
+            col = self.sort_columns[0][0]
+            self.last_key = (rows[-1][col], rows[-1][0])
+            self.insertDataRows(rows)
+
+    def pageFailed(self, error):
+        """
+        Function for stopping the paging after a page could not be read
+        """
+        self.fetching = False
+        self.has_more = False
+        print("Could not read page from the database: {0}".format(error))
+
+    def enableTextIndex(self, text_columns):
+        """
+        Function for choosing the text columns filtered with findRows. Paged tables are filtered in the database, so no index is built.
+        """
+        self.filter_columns = list(text_columns)
+
+    def findRows(self, col, mode, text):
+        """
+        Function for filtering a paged table. The filter is turned into database filters and the table is loaded again, so None is returned and the rows are not filtered in the view.
+        """
+        text = text.strip()
+        filters = []
+
+        if text and col is not None and self.isNumericColumn(col):
+            try:
+                low, high = parseRange(text)
+            except ValueError:
+                return None
+            if low is not None:
+                filters.append((col, '>=', low))
+            if high is not None:
+                filters.append((col, '<=', high))
+        elif text:
+            filters.append((self.filter_columns if col is None else col, mode, text))
+
+        self.setFilters(filters)
+        return None
+
+    def setFilters(self, filters):
+        """
+        Function for filtering the table in the database. filters is a list of (column, operator, value) tuples. The table is loaded again from its first page.
+        """
+        self.filters = list(filters)
+        if self.loaded:
+            self.fetchDataFromDB()
+
+    def sort(self, col, order = Qt.AscendingOrder):
+        """
+        Function for sorting the table by a column in the database. The table is loaded again from its first page. Rows are ordered by the column and then by id, so selected rows are not moved first in a paged table.
+        """
+        self.sort_columns = [(col, order != Qt.AscendingOrder)]
+        if self.loaded:
+            self.fetchDataFromDB()
+
+    def resort(self):
+        """
+        Function for sorting again. The rows of a paged table are already in database order.
+        """
+        pass
+
+    def regroupTab(self):
+        """
+        Function for updating a paged tab that has been hidden while the selection changed. Rows are kept in database order and only repainted.
+        """
+        self.updateSelectionMask()
+        if len(self.array_data):
+            self.emitBackgroundChanged(0, len(self.array_data) - 1)
+
 class AbstractStorageTableModel(StationToolTableModel):
     """
     Class for handling temporary table models. All data is first imported to temporary storage table model. It will then be either abandoned or pushed to the database and then destroyed.
@@ -201,6 +494,53 @@ class AbstractStorageTableModel(StationToolTableModel):
         """
         raise Exception("pushDataToDatabase has not been redefined! Inherit AbstractStorageTableModel to your own class and redefine pushDataToDatabase for this to work")
 
+class StationToolFilterModel(QSortFilterProxyModel):
+    """
+    Proxy model that shows only the rows of a database table model whose ids have been accepted by the filter bar. Sorting is passed to the source model, so the rows keep the order of the source model.
+    """
+    def __init__(self, parent, source_model):
+        QSortFilterProxyModel.__init__(self, parent)
+        self.setSourceModel(source_model)
+        self.accepted_ids = None
+        self.accepted_mask = None
+        source_model.layoutAboutToBeChanged.connect(self.resetAcceptedMask)
+        source_model.modelAboutToBeReset.connect(self.resetAcceptedMask)
+        source_model.rowsAboutToBeInserted.connect(self.resetAcceptedMask)
+        source_model.rowsAboutToBeRemoved.connect(self.resetAcceptedMask)
+
+    def setAcceptedIds(self, accepted_ids):
+        """
+        Function for setting the ids of the rows to show. None shows all rows.
+        """
+        self.accepted_ids = None if accepted_ids is None else frozenset(accepted_ids)
+        self.accepted_mask = None
+        self.invalidateFilter()
+
+    def resetAcceptedMask(self, *args):
+        """
+        Function for forgetting the accepted rows after the rows of the source model have moved
+        """
+        self.accepted_mask = None
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """
+        Overridden filterAcceptsRow function. The accepted rows of the whole table are looked up at once and reused until the source rows change.
+        """
+        if self.accepted_ids is None:
+            return True
+
+        array_data = self.sourceModel().array_data
+        if self.accepted_mask is None or len(self.accepted_mask) != len(array_data):
+            self.accepted_mask = array_data.selectionMask(self.accepted_ids)
+
+        return bool(self.accepted_mask[source_row])
+
+    def sort(self, col, order = Qt.AscendingOrder):
+        """
+        Overridden sort function that sorts the source model
+        """
+        self.sourceModel().sort(col, order)
+
 class DataViewTab(QWidget):
     """
     DataViewTab for handling the table data.
@@ -228,6 +568,11 @@ class DataViewTab(QWidget):
 
         self.selected_id = -1
         self.selected_storage_id = -1
+        self.view_dirty = False
+        self.database_model = None
+        self.filter_model = None
+        self.filter_bar = None
+        self.active_filter = None
         self.database_view.clicked.connect(self.saveDataRowID)
         self.storage_view.clicked.connect(self.saveStorageRowID)
 
@@ -242,15 +587,55 @@ class DataViewTab(QWidget):
         """
         Add models to DatabViewTab after initialisation
         """
+        self.database_model = database_model
         self.database_view.setModel(database_model)
         self.storage_view.setModel(storage_model)
         self.resizeAll()
 
+    def addFilterBar(self, text_columns):
+        """
+        Function for adding a filter bar above the database table. text_columns are the text columns the filter is matched against, numeric columns can always be filtered by range.
+        """
+        self.database_model.enableTextIndex(text_columns)
+        self.filter_model = StationToolFilterModel(self, self.database_model)
+        self.database_view.setModel(self.filter_model)
+        self.filter_bar = DataViewFilterBar(self, self.database_model)
+        self.layout.insertWidget(0, self.filter_bar)
+
+        if self.database_model.text_index is not None:
+            self.database_model.rowsInserted.connect(self.reapplyFilter)
+            self.database_model.modelReset.connect(self.reapplyFilter)
+            self.database_model.dataChanged.connect(self.reapplyFilterOnDataChange)
+
+    def applyFilter(self, col, mode, text):
+        """
+        Function for showing only the database rows matching the filter bar
+        """
+        self.active_filter = (col, mode, text)
+        self.filter_model.setAcceptedIds(self.database_model.findRows(col, mode, text))
+
+    def reapplyFilter(self, *args):
+        """
+        Function for running the active filter again after rows have been added to or replaced in the database model, so that new matching rows are shown
+        """
+        if self.active_filter is not None and self.active_filter[2].strip():
+            self.filter_model.setAcceptedIds(self.database_model.findRows(*self.active_filter))
+
+    def reapplyFilterOnDataChange(self, top_left, bottom_right, roles = ()):
+        """
+        Function for running the active filter again after the values of rows have changed. Changes of the background only are ignored.
+        """
+        if not roles or Qt.DisplayRole in roles:
+            self.reapplyFilter()
+
     def updateDatabaseModel(self):
         """
         Function for updating a the databaseModel to correspond to the database.
         """
-        self.database_view.model().fetchDataFromDB()
+        if self.database_model.loaded:
+            self.database_model.refreshDataFromDB()
+        else:
+            self.database_model.ensureLoaded()
         self.database_view.resizeColumnsToContents()
 
     def addRowToStorage(self, data):
@@ -259,6 +644,12 @@ class DataViewTab(QWidget):
         """
         self.storage_view.model().insertNewDataRow(data)
 
+    def addRowsToStorage(self, rows):
+        """
+        Function for adding many rows to the Storage Model at once.
+        """
+        self.storage_view.model().insertDataRows(rows)
+
     def pushStorageModelToDatabase(self):
         """
         Function for pushing storage data to the database.
@@ -275,7 +666,6 @@ class DataViewTab(QWidget):
             #modifiers = QApplication.keyboardModifiers()
             #if modifiers == Qt.ControlModifier:
             self.addIdToSelection(index.sibling(index.row(), 0).data())
-            self.database_view.model().sort(0)
 
     def saveStorageRowID(self, index):
         """
@@ -292,11 +682,26 @@ class DataViewTab(QWidget):
 
     def updateView(self):
         """
-        Function for updating views of this tab
+        Function for updating views of this tab. A hidden tab is only marked dirty and updated when it is shown.
         """
-        self.database_view.model().updateTab()
+        if not self.isVisible():
+            self.view_dirty = True
+            return
+
+        self.database_model.updateTab()
         self.storage_view.model().updateTab()
 
+    def showEvent(self, event):
+        """
+        Overridden showEvent for loading the tab the first time it is shown and updating a tab that has been marked dirty while it was hidden
+        """
+        self.database_model.ensureLoaded()
+        if self.view_dirty:
+            self.view_dirty = False
+            self.database_model.regroupTab()
+            self.storage_view.model().regroupTab()
+        QWidget.showEvent(self, event)
+
     def removeSelectedFromStorage(self):
         """
         Remove selected id from storage
@@ -319,3 +724,48 @@ class DataViewTabButtons(QWidget):
         self.setLayout(self.layout)
         self.layout.setAlignment(Qt.AlignRight)
 
+class DataViewFilterBar(QWidget):
+    """
+    Filter bar above the database table of a DataViewTab. The table is filtered on every keystroke by prefix or substring over the text columns or by a range of a numeric column.
+    """
+    def __init__(self, parent, database_model):
+        QWidget.__init__(self, parent)
+        self.database_model = database_model
+
+        self.column_box = QComboBox()
+        self.column_box.addItem("All text columns", None)
+        for col in database_model.filter_columns:
+            self.column_box.addItem(database_model.header_data[col], col)
+        for col in range(len(database_model.header_types)):
+            if database_model.isNumericColumn(col):
+                self.column_box.addItem(database_model.header_data[col], col)
+
+        self.mode_box = QComboBox()
+        self.mode_box.addItem("Starts with", StationToolTableModel.FILTER_PREFIX)
+        self.mode_box.addItem("Contains", StationToolTableModel.FILTER_CONTAINS)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter")
+        self.filter_edit.setClearButtonEnabled(True)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.column_box)
+        layout.addWidget(self.mode_box)
+        layout.addWidget(self.filter_edit)
+        self.setLayout(layout)
+
+        self.column_box.currentIndexChanged.connect(self.filterChanged)
+        self.mode_box.currentIndexChanged.connect(self.filterChanged)
+        self.filter_edit.textChanged.connect(self.filterChanged)
+
+    def filterChanged(self, *args):
+        """
+        Function for filtering the table after the filter has been edited
+        """
+        col = self.column_box.currentData()
+        numeric = col is not None and self.database_model.isNumericColumn(col)
+
+        self.mode_box.setEnabled(not numeric)
+        self.filter_edit.setPlaceholderText("min..max" if numeric else "Filter")
+        self.parent().applyFilter(col, self.mode_box.currentData(), self.filter_edit.text())
@@ -3,34 +3,39 @@ This module contains DataViewWidget class, which contains all the data view widg
 """
 
 from PyQt5.QtWidgets import (QWidget, QTabWidget, QVBoxLayout, QAction)
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon
 from dataViewer.stationTab import StationViewTab
 from dataViewer.sitechanTab import SitechanViewTab
 from dataViewer.sensorTab import SensorViewTab
 from dataViewer.instrumentTab import InstrumentViewTab
 from dataViewer.responseTab import ResponseTab
+from dataViewer.inventoryTreeTab import InventoryTreeTab
 
 class DataViewWidget(QWidget):
     """
     Class that contains all DataTab objects and allows shuffling through them easily with tabs.
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker, prefetch_tabs = True):
         super(QWidget, self).__init__(parent)
+        self.prefetch_tabs = prefetch_tabs
         self.tabs = QTabWidget()
         self.tabs.resize(300,200)
 
         self.selection_manager = selection_manager
-        self.station_tab = StationViewTab(self, database_api, selection_manager)
-        self.sitechan_tab = SitechanViewTab(self, database_api, selection_manager)
-        self.sensor_tab = SensorViewTab(self, database_api, selection_manager)
-        self.instrument_tab = InstrumentViewTab(self, database_api, selection_manager)
-        self.response_tab = ResponseTab(self, database_api, selection_manager)
+        self.station_tab = StationViewTab(self, database_api, selection_manager, database_worker)
+        self.sitechan_tab = SitechanViewTab(self, database_api, selection_manager, database_worker)
+        self.sensor_tab = SensorViewTab(self, database_api, selection_manager, database_worker)
+        self.instrument_tab = InstrumentViewTab(self, database_api, selection_manager, database_worker)
+        self.response_tab = ResponseTab(self, database_api, selection_manager, database_worker)
+        self.inventory_tab = InventoryTreeTab(self, database_api, selection_manager, database_worker)
 
         self.tabs.addTab(self.station_tab, 'Station')
         self.tabs.addTab(self.sitechan_tab, 'Sitechan')
         self.tabs.addTab(self.sensor_tab, 'Sensor')
         self.tabs.addTab(self.instrument_tab, 'Instrument')
         self.tabs.addTab(self.response_tab, 'Response')
+        self.tabs.addTab(self.inventory_tab, 'Inventory')
         self.layout = QVBoxLayout(self)
         self.layout.addWidget(self.tabs)
         self.setLayout(self.layout)
@@ -41,6 +46,22 @@ class DataViewWidget(QWidget):
 
         self.addAction(clear_act)
 
+    def showEvent(self, event):
+        """
+        Overridden showEvent for prefetching the data of the hidden tabs in the background after the first paint. Tabs are otherwise loaded when they are first shown.
+        """
+        QWidget.showEvent(self, event)
+        if self.prefetch_tabs:
+            self.prefetch_tabs = False
+            QTimer.singleShot(0, self.prefetchTabs)
+
+    def prefetchTabs(self):
+        """
+        Function for loading the data of every tab that has not been shown yet
+        """
+        for tab in (self.station_tab, self.sitechan_tab, self.sensor_tab, self.instrument_tab):
+            tab.database_model.ensureLoaded()
+
     def clearSelectionFields(self):
         """
         Function for clearing all selections
@@ -17,8 +17,8 @@ class InstrumentDatabaseModel(AbstractDatabaseTableModel):
     """
     Class for handling instrument database model
     """
-    def __init__(self, parent, header, database_api, selection_manager):
-        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api)
+    def __init__(self, parent, header, database_api, selection_manager, database_worker):
+        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api, database_worker)
         self.selection_manager = selection_manager
         self.instruments = []
 
@@ -30,9 +30,42 @@ class InstrumentDatabaseModel(AbstractDatabaseTableModel):
 
     def fetchDataFromDB(self):
         """
-        InstrumentDatabaseModels overridden fetchDataFromDB function for filling the table with database related information
+        InstrumentDatabaseModels overridden fetchDataFromDB function for filling the table with database related information. The instruments are read from the local inventory cache when it exists and streamed from the database otherwise.
         """
-        self.instruments = self.database_api.getInstruments()
+        if self.database_api.hasInventoryCache():
+            self.database_worker.submit('fetch-instruments', self.database_api.loadInventoryInstruments, callback = self.setInstruments)
+            return
+
+        self.instruments = []
+        self.clearModelData()
+        self.database_worker.submitStream('fetch-instruments', self.database_api.streamInstruments,
+                                          chunk_callback = self.addInstruments, callback = self.finishInstruments)
+
+    def addInstruments(self, instruments):
+        """
+        Function for adding a chunk of instruments streamed from the database to the table
+        """
+        self.instruments.extend(instruments)
+        self.insertDataRows([self.instrumentToDataRow(ins) for ins in instruments])
+
+    def finishInstruments(self, result):
+        """
+        Function for sorting the table once all instruments have been streamed from the database. The streamed instruments are then replaced with the instruments of the shared inventory store.
+        """
+        self.resort()
+        self.database_worker.submit('fetch-instruments', self.database_api.loadInventoryInstruments, callback = self.useStoreInstruments)
+
+    def useStoreInstruments(self, instruments):
+        """
+        Function for replacing the streamed instruments with the instruments of the shared inventory store. The rows of the table are already up to date, so the table is not filled again.
+        """
+        self.instruments = instruments
+
+    def setInstruments(self, instruments):
+        """
+        Function for filling the table with instruments fetched from the database
+        """
+        self.instruments = instruments
         self.updateInstrumentsArrayModel()
 
     def updateInstrumentsArrayModel(self):
@@ -40,19 +73,38 @@ class InstrumentDatabaseModel(AbstractDatabaseTableModel):
         Function for updating model data_array to match instruments own list of instruments
         """
         self.clearModelData()
-        for ins in self.instruments:
-            self.insertNewDataRow([ ins.i_id,
-                                    ins.instrument_name,
-                                    ins.instrument_type,
-                                    ins.band,
-                                    ins.digital,
-                                    ins.samprate,
-                                    ins.ncalib,
-                                    ins.ncalper,
-                                    ins.resp_dir,
-                                    ins.dfile,
-                                    ins.rsptype,
-                                    ins.lddate])
+        self.insertDataRows([self.instrumentToDataRow(ins) for ins in self.instruments])
+
+    def instrumentToDataRow(self, ins):
+        """
+        Function for transforming a nordb Instrument into a table row
+        """
+        return [ins.i_id,
+                ins.instrument_name,
+                ins.instrument_type,
+                ins.band,
+                ins.digital,
+                ins.samprate,
+                ins.ncalib,
+                ins.ncalper,
+                ins.resp_dir,
+                ins.dfile,
+                ins.rsptype,
+                ins.lddate]
+
+    def refreshDataFromDB(self):
+        """
+        InstrumentDatabaseModels overridden refreshDataFromDB function that only fetches instruments added or modified after the last sync
+        """
+        max_id, max_lddate = self.getSyncWatermark(self.instruments, 'i_id', 'lddate')
+        self.database_worker.submit('fetch-instruments', self.database_api.getInstrumentsSince, (max_id, max_lddate), self.mergeInstruments)
+
+    def mergeInstruments(self, instruments):
+        """
+        Function for merging instruments fetched from the database into the table
+        """
+        self.instruments = self.database_api.instruments
+        self.mergeDataRows([self.instrumentToDataRow(ins) for ins in instruments])
 
 
 class InstrumentStorageModel(AbstractStorageTableModel):
@@ -65,8 +117,7 @@ class InstrumentStorageModel(AbstractStorageTableModel):
         self.stored_responses = []
 
     def pushDataToDatabase(self):
-        for resp in self.stored_responses:
-            self.database_model.database_api.insertResponse(resp)
+        new_instruments = []
 
         for ins in self.array_data:
             new_ins = Instrument()
@@ -81,14 +132,15 @@ class InstrumentStorageModel(AbstractStorageTableModel):
             new_ins.dfile = ins[9]
             new_ins.rsptype = ins[10]
             new_ins.lddate = ins[11]
+            new_instruments.append(new_ins)
 
-            for resp in self.stored_responses:
-                if resp.file_name == new_ins.dfile:
-                    new_ins.response_id = resp.response_id
-                    break
-
-            self.database_model.database_api.insertInstrument(new_ins)
+        self.database_model.database_worker.submit('push-instruments', self.database_model.database_api.insertInstrumentsWithResponses,
+                                                   (new_instruments, list(self.stored_responses)), self.finishPush)
 
+    def finishPush(self, result):
+        """
+        Function for clearing the storage once the instruments and responses have been inserted to the database
+        """
         self.stored_responses.clear()
         self.clearModelData()
         self.parent().updateDatabaseModel()
@@ -103,7 +155,7 @@ class InstrumentViewTab(DataViewTab):
     """
     Class for handling the table tab for instrument related information
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker):
         buttons = InstrumentViewTabButtons()
         DataViewTab.__init__(self, parent, buttons)
         selection_manager = selection_manager
@@ -124,39 +176,33 @@ class InstrumentViewTab(DataViewTab):
                  ]
 
         self.database_api = database_api
-        self.instrument_db_model = InstrumentDatabaseModel(self, header, database_api, selection_manager)
+        self.database_worker = database_worker
+        self.instrument_db_model = InstrumentDatabaseModel(self, header, database_api, selection_manager, database_worker)
         self.instrument_storage_model = InstrumentStorageModel(self, header, self.instrument_db_model, selection_manager)
         self.addModels(self.instrument_db_model, self.instrument_storage_model)
+        self.addFilterBar([1, 9])
 
     def addIdToSelection(self, selected_id):
         """
-        Overridden selection function
+        Overridden selection function. Clicking an already selected row removes it from the selection.
         """
-        self.selection_manager.addInstrumentToSelection(selected_id)
+        if not self.selection_manager.removeInstrumentFromSelection(selected_id):
+            self.selection_manager.addInstrumentToSelection(selected_id)
         self.parent().parent().parent().parent().setSelectionText('Instrument')
 
-    def getSelectedInstrument(self):
+    def requestSelectedInstrument(self, callback):
         """
-        Function for getting the recently selected instrument
+        Function for getting the recently selected instrument through the database_worker. callback is called with the instrument in the GUI thread. Nothing is requested if no instrument has been selected.
         """
-        pass
+        if self.selected_id is None or self.selected_id == -1:
+            return
+        self.database_worker.submit('selected-instrument', self.database_api.getInstrument, (self.selected_id,), callback, interactive = True)
 
     def addInstrumentToStorage(self, instrument):
         """
         Function for adding a nordb Instrument object to the instrumentViewTabs model.
         """
-        data = [instrument.i_id,
-                instrument.instrument_name,
-                instrument.instrument_type,
-                instrument.band,
-                instrument.digital,
-                instrument.samprate,
-                instrument.ncalib,
-                instrument.ncalper,
-                instrument.resp_dir,
-                instrument.dfile,
-                instrument.rsptype,
-                instrument.lddate]
+        data = self.instrument_db_model.instrumentToDataRow(instrument)
 
         return self.addRowToStorage(data)
 
@@ -198,21 +244,27 @@ class InstrumentViewTabButtons(DataViewTabButtons):
         """
         Open a window for creating a new window
         """
-        self.widget = NewInstrumentWindow(self.parent().instrument_storage_model, self.parent().database_api)
+        self.widget = NewInstrumentWindow(self.parent().instrument_storage_model, self.parent().database_api, self.parent().database_worker)
         self.widget.show()
 
     def openConnectInstrumentWindowButton(self):
         """
         Open connect instrument window
         """
-        instrument = self.parent().getSelectedInstrument()
+        self.parent().requestSelectedInstrument(self.openConnectInstrumentWindow)
 
+    def openConnectInstrumentWindow(self, instrument):
+        """
+        Function for opening the connect instrument window for the selected instrument
+        """
         if instrument is None:
             return
 
-        self.widget = ConnectInstrumentWindow(self.parent().sitechan_storage_model,
-                                              self.parent().sensor_storage_model,
+        data_view_widget = self.parent().parent().parent().parent()
+        self.widget = ConnectInstrumentWindow(data_view_widget.sitechan_tab.sitechan_storage_model,
+                                              data_view_widget.sensor_tab.sensor_storage_model,
                                               self.parent().database_api,
+                                              self.parent().database_worker,
                                               instrument.ncalib,
                                               instrument.ncalper,
                                               instrument.i_id)
@@ -0,0 +1,258 @@
+"""
+This module contains the InventoryTreeTab class, which shows the station inventory as a tree of stations, sitechans, sensors, instruments and responses.
+"""
+from PyQt5.QtWidgets import QWidget, QTreeView, QVBoxLayout
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, QVariant, Qt
+
+from other.inventoryGraph import sensorInstrumentId
+from other.utils import date2String, epoch2String
+
+NO_DATA = QVariant()
+
+class InventoryTreeNode(object):
+    """
+    Node of the InventoryTreeModel. The children of a node are created from the inventory objects in memory the first time the node is expanded.
+    """
+    STATION = 'Station'
+    SITECHAN = 'Sitechan'
+    SENSOR = 'Sensor'
+    INSTRUMENT = 'Instrument'
+    RESPONSE = 'Response'
+
+    def __init__(self, kind, obj, parent, row):
+        self.kind = kind
+        self.obj = obj
+        self.parent = parent
+        self.row = row
+        self.children = None
+
+class InventoryTreeModel(QAbstractItemModel):
+    """
+    Tree model over the station inventory. Only the stations are created when the model is filled, the children of a node are created by fetchMore from Station.sitechans, Sitechan.sensors and the instruments indexed by the DatabaseApi when the node is expanded, so expanding never queries the database.
+    """
+    def __init__(self, parent, database_api):
+        QAbstractItemModel.__init__(self, parent)
+        self.database_api = database_api
+        self.header_data = ['Name', 'Id', 'Description', 'Start', 'End']
+        self.root = InventoryTreeNode(None, None, None, 0)
+        self.root.children = []
+
+    def setStations(self, stations):
+        """
+        Function for filling the tree with stations. Their children are created when they are expanded.
+        """
+        self.beginResetModel()
+        self.root.children = [InventoryTreeNode(InventoryTreeNode.STATION, stat, self.root, i) for i, stat in enumerate(stations)]
+        self.endResetModel()
+
+    def nodeFromIndex(self, index):
+        """
+        Function for getting the node of an index. The invalid index is the root.
+        """
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def sensorInstrument(self, sen):
+        """
+        Function for getting the instrument of a sensor from memory or None if it is not known. The instrument indexed by the DatabaseApi is preferred over the one attached to the sensor.
+        """
+        ins = self.database_api.instruments_by_id.get(sensorInstrumentId(sen))
+        if ins is None and getattr(sen, 'instruments', None):
+            ins = sen.instruments[0]
+        return ins
+
+    def childObjects(self, node):
+        """
+        Function for getting the kind and the inventory objects of the children of node
+        """
+        if node.kind == InventoryTreeNode.STATION:
+            return InventoryTreeNode.SITECHAN, node.obj.sitechans
+        if node.kind == InventoryTreeNode.SITECHAN:
+            return InventoryTreeNode.SENSOR, node.obj.sensors
+        if node.kind == InventoryTreeNode.SENSOR:
+            ins = self.sensorInstrument(node.obj)
+            return InventoryTreeNode.INSTRUMENT, [] if ins is None else [ins]
+        if node.kind == InventoryTreeNode.INSTRUMENT:
+            response = getattr(node.obj, 'response', None)
+            return InventoryTreeNode.RESPONSE, [] if response is None else [response]
+        return None, []
+
+    def index(self, row, column, parent = QModelIndex()):
+        """
+        Overridden index function
+        """
+        node = self.nodeFromIndex(parent)
+        if node.children is None or row < 0 or row >= len(node.children) or column < 0 or column >= len(self.header_data):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index = None):
+        """
+        Overridden parent function. Without an index the parent object of the model is returned.
+        """
+        if index is None:
+            return QAbstractItemModel.parent(self)
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def rowCount(self, parent = QModelIndex()):
+        """
+        Overridden rowCount function. Nodes that have not been expanded have no rows yet.
+        """
+        if parent.column() > 0:
+            return 0
+        node = self.nodeFromIndex(parent)
+        if node.children is None:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent = QModelIndex()):
+        """
+        Overridden columnCount function
+        """
+        return len(self.header_data)
+
+    def hasChildren(self, parent = QModelIndex()):
+        """
+        Overridden hasChildren function for showing the expand arrow before the children have been created
+        """
+        node = self.nodeFromIndex(parent)
+        if node.children is not None:
+            return len(node.children) > 0
+        return len(self.childObjects(node)[1]) > 0
+
+    def canFetchMore(self, parent):
+        """
+        Overridden canFetchMore function
+        """
+        node = self.nodeFromIndex(parent)
+        return node.children is None and len(self.childObjects(node)[1]) > 0
+
+    def fetchMore(self, parent):
+        """
+        Overridden fetchMore function for creating the children of a node from memory
+        """
+        node = self.nodeFromIndex(parent)
+        if node.children is not None:
+            return
+
+        kind, objects = self.childObjects(node)
+        if not objects:
+            node.children = []
+            return
+
+        self.beginInsertRows(parent, 0, len(objects) - 1)
+        node.children = [InventoryTreeNode(kind, obj, node, i) for i, obj in enumerate(objects)]
+        self.endInsertRows()
+
+    def nodeValues(self, node):
+        """
+        Function for getting the values of the columns of a node
+        """
+        obj = node.obj
+        if node.kind == InventoryTreeNode.STATION:
+            return [obj.station_code, obj.s_id, obj.station_name, obj.on_date, obj.off_date]
+        if node.kind == InventoryTreeNode.SITECHAN:
+            return [obj.channel_code, obj.s_id, obj.description, obj.on_date, obj.off_date]
+        if node.kind == InventoryTreeNode.SENSOR:
+            return ["{0} {1}".format(obj.station_code, obj.channel_code), obj.s_id, None,
+                    None if obj.time is None else epoch2String(obj.time),
+                    None if obj.endtime is None else epoch2String(obj.endtime)]
+        if node.kind == InventoryTreeNode.INSTRUMENT:
+            return [obj.instrument_name, obj.i_id, obj.instrument_type, None, None]
+        return [obj.file_name, obj.response_id, obj.response_format, None, None]
+
+    def data(self, index, role):
+        """
+        Overridden data function
+        """
+        if index.isValid() and role == Qt.DisplayRole:
+            value = self.nodeValues(index.internalPointer())[index.column()]
+            if hasattr(value, 'strftime'):
+                return date2String(value)
+            return value
+        return NO_DATA
+
+    def headerData(self, col, orientation, role):
+        """
+        Overridden headerData function
+        """
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return QVariant(self.header_data[col])
+        return QAbstractItemModel.headerData(self, col, orientation, role)
+
+class InventoryTreeTab(QWidget):
+    """
+    Tab for browsing the station inventory as a tree. The inventory is loaded once through the database_worker and the tree is filled again only when the inventory has changed.
+    """
+    def __init__(self, parent, database_api, selection_manager, database_worker):
+        super(QWidget, self).__init__(parent)
+        self.database_api = database_api
+        self.selection_manager = selection_manager
+        self.database_worker = database_worker
+        self.inventory_version = None
+
+        self.tree_model = InventoryTreeModel(self, database_api)
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.tree_model)
+        self.tree_view.setUniformRowHeights(True)
+        self.tree_view.clicked.connect(self.selectNode)
+
+        self.layout = QVBoxLayout(self)
+        self.layout.addWidget(self.tree_view)
+        self.setLayout(self.layout)
+
+    def showEvent(self, event):
+        """
+        Overridden showEvent for filling the tree the first time it is shown and after the inventory has changed
+        """
+        if self.inventory_version != self.database_api.inventory_store.version:
+            self.database_worker.submit('inventory-tree', self.loadInventory, callback = self.setInventory)
+        QWidget.showEvent(self, event)
+
+    def loadInventory(self):
+        """
+        Function for loading the stations and the instruments of the tree. Runs in the database_worker.
+        """
+        self.database_api.loadInventoryInstruments()
+        return self.database_api.inventory_store.version, self.database_api.stations
+
+    def setInventory(self, inventory):
+        """
+        Function for filling the tree with the loaded stations
+        """
+        self.inventory_version, stations = inventory
+        self.tree_model.setStations(stations)
+        self.tree_view.resizeColumnToContents(0)
+
+    def selectNode(self, index):
+        """
+        Function for adding the clicked station, sitechan, sensor or instrument to the selection or removing it if it was already selected. Clicking an instrument or a response also shows the response.
+        """
+        if not index.isValid():
+            return
+
+        node = index.internalPointer()
+        if node.kind == InventoryTreeNode.RESPONSE:
+            node = node.parent
+
+        if node.kind == InventoryTreeNode.STATION:
+            remove, add = self.selection_manager.removeStationFromSelection, self.selection_manager.addStationToSelection
+        elif node.kind == InventoryTreeNode.SITECHAN:
+            remove, add = self.selection_manager.removeSitechanFromSelection, self.selection_manager.addSitechanToSelection
+        elif node.kind == InventoryTreeNode.SENSOR:
+            remove, add = self.selection_manager.removeSensorFromSelection, self.selection_manager.addSensorToSelection
+        else:
+            remove, add = self.selection_manager.removeInstrumentFromSelection, self.selection_manager.addInstrumentToSelection
+            self.parent().parent().parent().response_tab.updateResponseTab(node.obj.i_id)
+
+        selected_id = node.obj.i_id if node.kind == InventoryTreeNode.INSTRUMENT else node.obj.s_id
+        if not remove(selected_id):
+            add(selected_id)
+
+        self.parent().parent().parent().parent().setSelectionText(node.kind)
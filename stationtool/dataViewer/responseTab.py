@@ -8,12 +8,13 @@ class ResponseTab(QWidget):
     """
     Tab for response information.
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker):
         super(QWidget, self).__init__(parent)
         self.layout = QHBoxLayout(self)
 
         self.selection_manager = selection_manager
         self.database_api = database_api
+        self.database_worker = database_worker
         self.instrument_id = -1
         self.textBox = QPlainTextEdit()
         self.textBox.setStyleSheet("background: white")
@@ -32,13 +33,19 @@ class ResponseTab(QWidget):
         """
         self.instrument_id = instrument_id
         if (self.instrument_id == -1):
+            self.database_worker.cancel('response')
             self.textBox.setPlainText("No instrument chosen!")
         else:
-            resp = self.database_api.getResponse(self.instrument_id)
-            if resp is None:
-                return
-            self.textBox.setPlainText(str(resp))
-            self.response_plotter.plot(resp)
+            self.database_worker.submit('response', self.database_api.getResponse, (self.instrument_id,), self.showResponse, interactive = True)
+
+    def showResponse(self, resp):
+        """
+        Function for showing a response fetched from the database
+        """
+        if resp is None:
+            return
+        self.textBox.setPlainText(str(resp))
+        self.response_plotter.plot(resp)
 
 class ResponsePlotter(FigureCanvas):
     """
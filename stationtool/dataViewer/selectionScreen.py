@@ -2,13 +2,19 @@
 This module contains the class definition for selectionScreen object.
 """
 
-from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel, QDateTimeEdit, QPushButton, QSizePolicy
-from PyQt5.QtCore import Qt
+from datetime import date, timedelta
+
+from PyQt5.QtWidgets import QWidget, QGridLayout, QLabel, QDateTimeEdit, QPushButton, QSizePolicy, QSlider
+from PyQt5.QtCore import Qt, QTimer
+
+from other.utils import date2QDate
 
 class SelectionScreen(QWidget):
     """
     Screen for showing and modifying current selections
     """
+    SLIDER_DELAY_MS = 200
+
     def __init__(self, parent, selection_manager):
         super().__init__(parent)
         self.selection_manager = selection_manager
@@ -32,6 +38,16 @@ class SelectionScreen(QWidget):
         self.date_widget.dateChanged.connect(self.handleSelectDate)
         self.date_widget.setEnabled(False)
 
+        self.date_slider = QSlider(Qt.Horizontal, self)
+        self.date_slider.setEnabled(False)
+        self.date_slider.valueChanged.connect(self.handleSliderMoved)
+        self.first_date = None
+
+        self.slider_timer = QTimer(self)
+        self.slider_timer.setSingleShot(True)
+        self.slider_timer.setInterval(self.SLIDER_DELAY_MS)
+        self.slider_timer.timeout.connect(self.selectSliderDate)
+
         self.enable_date_button = QPushButton('Enable', self)
         self.enable_date_button.clicked.connect(self.enableSelectDate)
         self.enabled = False
@@ -51,10 +67,11 @@ class SelectionScreen(QWidget):
         layout.addWidget(self.date_label, 0, 0,)
         layout.addWidget(self.date_widget, 0, 1)
         layout.addWidget(self.enable_date_button, 0, 2)
-        layout.addWidget(self.selected_label, 1, 0)
-        layout.addWidget(self.selected_field, 1, 1)
-        layout.addWidget(self.clear_all_button, 1, 2)
-        layout.addWidget(empty_widget, 2, 0)
+        layout.addWidget(self.date_slider, 1, 0, 1, 3)
+        layout.addWidget(self.selected_label, 2, 0)
+        layout.addWidget(self.selected_field, 2, 1)
+        layout.addWidget(self.clear_all_button, 2, 2)
+        layout.addWidget(empty_widget, 3, 0)
         self.setLayout(layout)
 
     def clearAllSelections(self):
@@ -68,19 +85,31 @@ class SelectionScreen(QWidget):
         Function for updating all views
         """
         self.parent().parent().updateDataViewWidget()
+        self.parent().updateMapView()
+
+    def setDateRange(self, first_date, last_date):
+        """
+        Function for setting the range of the date slider. The range is always extended to today.
+        """
+        self.first_date = first_date
+        self.date_slider.setRange(0, (max(last_date, date.today()) - first_date).days)
 
     def enableSelectDate(self):
         """
         Function for clearing date selection
         """
+        self.slider_timer.stop()
         if self.enabled:
             self.date_widget.setEnabled(False)
+            self.date_slider.setEnabled(False)
             self.selection_manager.clearDate()
             self.enabled = False
             self.enable_date_button.setText('Enable')
         else:
             self.date_widget.setEnabled(True)
+            self.date_slider.setEnabled(self.first_date is not None)
             self.selection_manager.selectDate(self.date_widget.date().toPyDate())
+            self.syncDateSlider(self.date_widget.date().toPyDate())
             self.enabled = True
             self.enable_date_button.setText('Disable')
 
@@ -90,7 +119,36 @@ class SelectionScreen(QWidget):
         """
         Function that handles select date changes
         """
+        self.slider_timer.stop()
         self.selection_manager.selectDate(new_date.toPyDate())
+        self.syncDateSlider(new_date.toPyDate())
+        self.updateViews()
+
+    def syncDateSlider(self, selected_date):
+        """
+        Function for moving the date slider to selected_date without triggering handleSliderMoved
+        """
+        if self.first_date is not None:
+            self.date_slider.blockSignals(True)
+            self.date_slider.setValue((selected_date - self.first_date).days)
+            self.date_slider.blockSignals(False)
+
+    def handleSliderMoved(self, value):
+        """
+        Function that handles date slider changes by moving the date widget to the matching date. The date is selected only after the slider has stopped for SLIDER_DELAY_MS, so dragging the slider does not resolve the selection for every date passed.
+        """
+        if self.first_date is not None:
+            self.date_widget.blockSignals(True)
+            self.date_widget.setDate(date2QDate(self.first_date + timedelta(days = value)))
+            self.date_widget.blockSignals(False)
+            self.slider_timer.start()
+
+    def selectSliderDate(self):
+        """
+        Function for selecting the date the slider was left on
+        """
+        self.selection_manager.selectDate(self.date_widget.date().toPyDate())
+        self.updateViews()
 
     def changeSelectedFieldLabel(self, new_text):
         """
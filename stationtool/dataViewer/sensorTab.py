@@ -6,15 +6,17 @@ from PyQt5.QtCore import QVariant, Qt
 from PyQt5.QtGui import QColor
 
 from datetime import datetime, date
-from dataViewer.dataViewTab import (DataViewTab, AbstractDatabaseTableModel,
+
+from other.utils import epoch2String
+from dataViewer.dataViewTab import (DataViewTab, AbstractDatabaseTableModel, PagedDatabaseTableModel,
                                     AbstractStorageTableModel, DataViewTabButtons)
 
 class SensorDatabaseModel(AbstractDatabaseTableModel):
     """
     Class for handling sensor database model
     """
-    def __init__(self, parent, header, database_api, selection_manager):
-        AbstractDatabaseTableModel.__init__(self,parent, header, [], database_api)
+    def __init__(self, parent, header, database_api, selection_manager, database_worker):
+        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api, database_worker)
         self.selection_manager = selection_manager
         self.sensors = []
 
@@ -28,7 +30,13 @@ class SensorDatabaseModel(AbstractDatabaseTableModel):
         """
         SensorDatabaseModels overridden fetchDataFromDB function for filling the table with database related information
         """
-        self.sensors = self.database_api.getSensors()
+        self.database_worker.submit('fetch-sensors', self.database_api.getSensors, callback = self.setSensors)
+
+    def setSensors(self, sensors):
+        """
+        Function for filling the table with sensors fetched from the database
+        """
+        self.sensors = sensors
         self.updateSensorsArrayModel()
 
     def updateSensorsArrayModel(self):
@@ -36,18 +44,36 @@ class SensorDatabaseModel(AbstractDatabaseTableModel):
         Function for updating model data_array to match sensors own list of sensors
         """
         self.clearModelData()
-        for sen in self.sensors:
-            self.insertNewDataRow([ sen.s_id,
-                                    sen.station_code,
-                                    sen.channel_code,
-                                    sen.time,
-                                    sen.endtime,
-                                    sen.calratio,
-                                    sen.calper,
-                                    sen.tshift,
-                                    sen.instant,
-                                    sen.lddate])
+        self.insertDataRows([self.sensorToDataRow(sen) for sen in self.sensors])
+
+    def sensorToDataRow(self, sen):
+        """
+        Function for transforming a nordb Sensor into a table row
+        """
+        return [sen.s_id,
+                sen.station_code,
+                sen.channel_code,
+                sen.time,
+                sen.endtime,
+                sen.calratio,
+                sen.calper,
+                sen.tshift,
+                sen.instant,
+                sen.lddate]
+
+class SensorPagedDatabaseModel(PagedDatabaseTableModel, SensorDatabaseModel):
+    """
+    Class for handling the sensor database model one page at a time. Only the sensors the user scrolls to are read from the database.
+    """
+    def __init__(self, parent, header, database_api, selection_manager, database_worker):
+        PagedDatabaseTableModel.__init__(self, parent, header, [], database_api, database_worker)
+        self.selection_manager = selection_manager
 
+    def fetchPage(self, order_column, descending, after, limit, filters):
+        """
+        Overridden fetchPage function for reading a page of sensor rows
+        """
+        return self.database_api.getSensorPage(order_column, descending, after, limit, filters)
 
 class SensorStorageModel(AbstractStorageTableModel):
     """
@@ -68,7 +94,7 @@ class SensorViewTab(DataViewTab):
     """
     Class for handling the table tab for sensor related information
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker, paged = True):
         buttons = SensorViewTabButtons()
         DataViewTab.__init__(self, parent, buttons)
         self.selection_manager = selection_manager
@@ -84,35 +110,40 @@ class SensorViewTab(DataViewTab):
                     ["Instant", str],
                     ["Load date", date]]
 
-        sensor_db_model = SensorDatabaseModel(self, header, database_api, selection_manager)
-        sensor_storage_model = SensorStorageModel(self, header, sensor_db_model, selection_manager)
-        self.addModels(sensor_db_model, sensor_storage_model)
+        if paged:
+            self.sensor_db_model = SensorPagedDatabaseModel(self, header, database_api, selection_manager, database_worker)
+        else:
+            self.sensor_db_model = SensorDatabaseModel(self, header, database_api, selection_manager, database_worker)
+        self.sensor_storage_model = SensorStorageModel(self, header, self.sensor_db_model, selection_manager)
+        for model in (self.sensor_db_model, self.sensor_storage_model):
+            model.setColumnFormatter(3, epoch2String)
+            model.setColumnFormatter(4, epoch2String)
+        self.addModels(self.sensor_db_model, self.sensor_storage_model)
+        self.addFilterBar([1, 2])
 
     def addIdToSelection(self, selected_id):
         """
-        Overridden selection function
+        Overridden selection function. Clicking an already selected row removes it from the selection.
         """
         print('adding id {0} to selection'.format(selected_id))
-        self.selection_manager.addSensorToSelection(selected_id)
+        if not self.selection_manager.removeSensorFromSelection(selected_id):
+            self.selection_manager.addSensorToSelection(selected_id)
         self.parent().parent().parent().parent().setSelectionText('Sensor')
 
     def addSensorToStorage(self, sensor):
         """
         Function for adding a nordb Sensor object to the sensorViewTabs model.
         """
-        data = [sensor.s_id,
-                sensor.station_code,
-                sensor.channel_code,
-                sensor.time,
-                sensor.endtime,
-                sensor.calratio,
-                sensor.calper,
-                sensor.tshift,
-                sensor.instant,
-                sensor.lddate]
+        data = self.sensor_db_model.sensorToDataRow(sensor)
 
         return self.addRowToStorage(data)
 
+    def addSensorsToStorage(self, sensors):
+        """
+        Function for adding a list of nordb Sensor objects to the sensorViewTabs model at once.
+        """
+        self.addRowsToStorage([self.sensor_db_model.sensorToDataRow(sen) for sen in sensors])
+
 class SensorViewTabButtons(DataViewTabButtons):
     """
     Class for SensorViewTab buttons.
@@ -154,8 +185,7 @@ class SensorViewTabButtons(DataViewTabButtons):
                 print(e)
                 return
 
-        for s in sensors:
-            self.parent().addSensorToStorage(s)
+        self.parent().addSensorsToStorage(sensors)
 
         sensor_file.close()
 
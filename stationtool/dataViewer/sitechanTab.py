@@ -13,8 +13,8 @@ class SitechanDatabaseModel(AbstractDatabaseTableModel):
     """
     Class for handling sitechan database model.
     """
-    def __init__(self, parent, header, database_api, selection_manager):
-        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api)
+    def __init__(self, parent, header, database_api, selection_manager, database_worker):
+        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api, database_worker)
         self.selection_manager = selection_manager
         self.sitechans = []
 
@@ -28,7 +28,13 @@ class SitechanDatabaseModel(AbstractDatabaseTableModel):
         """
         SitechanDatabaseModels overridden fetchDataFromDB function for filling the table with database related information
         """
-        self.sitechans = self.database_api.getSitechans()
+        self.database_worker.submit('fetch-sitechans', self.database_api.getSitechans, callback = self.setSitechans)
+
+    def setSitechans(self, sitechans):
+        """
+        Function for filling the table with sitechans fetched from the database
+        """
+        self.sitechans = sitechans
         self.updateSitechanArrayModel()
 
     def updateSitechanArrayModel(self):
@@ -36,19 +42,23 @@ class SitechanDatabaseModel(AbstractDatabaseTableModel):
         Function for updating model data_array to match sitechans own list of sitechans
         """
         self.clearModelData()
+        self.insertDataRows([self.sitechanToDataRow(chan) for chan in self.sitechans])
 
-        for chan in self.sitechans:
-            self.insertNewDataRow( [chan.s_id,
-                                    chan.station_code,
-                                    chan.channel_code,
-                                    chan.on_date,
-                                    chan.off_date,
-                                    chan.channel_type,
-                                    chan.emplacement_depth,
-                                    chan.horizontal_angle,
-                                    chan.vertical_angle,
-                                    chan.description,
-                                    chan.load_date])
+    def sitechanToDataRow(self, chan):
+        """
+        Function for transforming a nordb Sitechan into a table row
+        """
+        return [chan.s_id,
+                chan.station_code,
+                chan.channel_code,
+                chan.on_date,
+                chan.off_date,
+                chan.channel_type,
+                chan.emplacement_depth,
+                chan.horizontal_angle,
+                chan.vertical_angle,
+                chan.description,
+                chan.load_date]
 
 class SitechanStorageModel(AbstractStorageTableModel):
     """
@@ -69,7 +79,7 @@ class SitechanViewTab(DataViewTab):
     """
     Class for handling the table tab for sitechan related information.
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker):
         buttons = SitechanViewTabButtons()
         DataViewTab.__init__(self, parent, buttons)
         self.selection_manager = selection_manager
@@ -85,35 +95,33 @@ class SitechanViewTab(DataViewTab):
                   ['Vertical Angle', float],
                   ['Description', str],
                   ['Load Date', date]]
-        sitechan_db_model = SitechanDatabaseModel(self, header, database_api, selection_manager)
-        sitechan_storage_model = SitechanStorageModel(self, header, sitechan_db_model, selection_manager)
-        self.addModels(sitechan_db_model, sitechan_storage_model)
+        self.sitechan_db_model = SitechanDatabaseModel(self, header, database_api, selection_manager, database_worker)
+        self.sitechan_storage_model = SitechanStorageModel(self, header, self.sitechan_db_model, selection_manager)
+        self.addModels(self.sitechan_db_model, self.sitechan_storage_model)
+        self.addFilterBar([1, 2, 9])
 
     def addIdToSelection(self, selected_id):
         """
-        Overridden selection function
+        Overridden selection function. Clicking an already selected row removes it from the selection.
         """
-        self.selection_manager.addSitechanToSelection(selected_id)
+        if not self.selection_manager.removeSitechanFromSelection(selected_id):
+            self.selection_manager.addSitechanToSelection(selected_id)
         self.parent().parent().parent().parent().setSelectionText('Sitechan')
 
     def addSitechanToStorage(self, sitechan):
         """
         Function for adding a nordb Sitechan object to the sitechanViewTabs model.
         """
-        data = [sitechan.s_id,
-                sitechan.station_code,
-                sitechan.channel_code,
-                sitechan.on_date,
-                sitechan.off_date,
-                sitechan.channel_type,
-                sitechan.emplacement_depth,
-                sitechan.horizontal_angle,
-                sitechan.vertical_angle,
-                sitechan.description,
-                sitechan.load_date]
+        data = self.sitechan_db_model.sitechanToDataRow(sitechan)
 
         return self.addRowToStorage(data)
 
+    def addSitechansToStorage(self, sitechans):
+        """
+        Function for adding a list of nordb Sitechan objects to the sitechanViewTabs model at once.
+        """
+        self.addRowsToStorage([self.sitechan_db_model.sitechanToDataRow(chan) for chan in sitechans])
+
 class SitechanViewTabButtons(DataViewTabButtons):
     """
     Class for StationViewTab buttons.
@@ -155,8 +163,7 @@ class SitechanViewTabButtons(DataViewTabButtons):
                 print(e)
                 return
 
-        for s in sitechan:
-            self.parent().addSitechanToStorage(s)
+        self.parent().addSitechansToStorage(sitechans)
 
         sitechan_file.close()
 
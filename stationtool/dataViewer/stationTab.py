@@ -19,11 +19,11 @@ class StationDatabaseModel(AbstractDatabaseTableModel):
     """
     Class for handling station database model.
     """
-    def __init__(self, parent, header, database_api, selection_manager):
-        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api)
+    def __init__(self, parent, header, database_api, selection_manager, database_worker):
+        AbstractDatabaseTableModel.__init__(self, parent, header, [], database_api, database_worker)
         self.selection_manager = selection_manager
         self.stations = []
-        self.sort(0)
+        self.resort()
 
     def getSelectedIds(self):
         """
@@ -45,32 +45,84 @@ class StationDatabaseModel(AbstractDatabaseTableModel):
 
     def fetchDataFromDB(self):
         """
-        StationDatabaseModels overridden fetchDataFromDB function for filling the table with database related information
+        StationDatabaseModels overridden fetchDataFromDB function for filling the table with database related information. The stations are read from the local inventory cache when it exists and streamed from the database otherwise.
         """
-        self.stations = self.database_api.getStations()
+        if self.database_api.hasInventoryCache():
+            self.database_worker.submit('fetch-stations', self.database_api.loadInventory, callback = self.setStations)
+            return
+
+        self.stations = []
+        self.clearModelData()
+        self.database_worker.submitStream('fetch-stations', self.database_api.streamStations,
+                                          chunk_callback = self.addStations, callback = self.finishStations)
+
+    def addStations(self, stations):
+        """
+        Function for adding a chunk of stations streamed from the database to the table
+        """
+        self.stations.extend(stations)
+        self.insertDataRows([self.stationToDataRow(stat) for stat in stations])
+
+    def finishStations(self, result):
+        """
+        Function for sorting the table once all stations have been streamed from the database. The streamed stations are then replaced with the stations of the shared inventory store.
+        """
+        self.resort()
+        self.database_worker.submit('fetch-stations', self.database_api.loadInventory, callback = self.useStoreStations)
+
+    def useStoreStations(self, stations):
+        """
+        Function for replacing the streamed stations with the stations of the shared inventory store. The rows of the table are already up to date, so the table is not filled again.
+        """
+        self.stations = stations
+
+    def setStations(self, stations):
+        """
+        Function for filling the table with stations fetched from the database
+        """
+        self.stations = stations
         self.updateStationArrayModel()
+        self.resort()
 
     def updateStationArrayModel(self):
         """
         Function for updating model data_array to match stations own list of stations
         """
         self.clearModelData()
+        self.insertDataRows([self.stationToDataRow(stat) for stat in self.stations])
 
-        for stat in self.stations:
-            self.insertNewDataRow( [stat.s_id,
-                                    stat.network,
-                                    stat.station_code,
-                                    stat.on_date,
-                                    stat.off_date,
-                                    stat.latitude,
-                                    stat.longitude,
-                                    stat.elevation,
-                                    stat.station_name,
-                                    stat.station_type,
-                                    stat.reference_station,
-                                    stat.north_offset,
-                                    stat.east_offset,
-                                    stat.load_date])
+    def stationToDataRow(self, stat):
+        """
+        Function for transforming a nordb Station into a table row
+        """
+        return [stat.s_id,
+                stat.network,
+                stat.station_code,
+                stat.on_date,
+                stat.off_date,
+                stat.latitude,
+                stat.longitude,
+                stat.elevation,
+                stat.station_name,
+                stat.station_type,
+                stat.reference_station,
+                stat.north_offset,
+                stat.east_offset,
+                stat.load_date]
+
+    def refreshDataFromDB(self):
+        """
+        StationDatabaseModels overridden refreshDataFromDB function that only fetches stations added or modified after the last sync
+        """
+        max_id, max_load_date = self.getSyncWatermark(self.stations, 's_id', 'load_date')
+        self.database_worker.submit('fetch-stations', self.database_api.getStationsSince, (max_id, max_load_date), self.mergeStations)
+
+    def mergeStations(self, stations):
+        """
+        Function for merging stations fetched from the database into the table
+        """
+        self.stations = self.database_api.stations
+        self.mergeDataRows([self.stationToDataRow(stat) for stat in stations])
 
 
 class StationStorageModel(AbstractStorageTableModel):
@@ -85,6 +137,8 @@ class StationStorageModel(AbstractStorageTableModel):
         """
         Function for pushing the station storage to the database
         """
+        new_stations = []
+
         for stat in self.array_data:
             new_stat = Station()
             new_stat.network = stat[1]
@@ -100,8 +154,15 @@ class StationStorageModel(AbstractStorageTableModel):
             new_stat.north_offset = stat[11]
             new_stat.east_offset = stat[12]
             new_stat.load_date = stat[13]
-            self.database_model.database_api.insertStation(stat)
+            new_stations.append(new_stat)
 
+        self.database_model.database_worker.submit('push-stations', self.database_model.database_api.insertStations,
+                                                   (new_stations,), self.finishPush)
+
+    def finishPush(self, result):
+        """
+        Function for clearing the storage once the stations have been inserted to the database
+        """
         self.clearModelData()
         self.parent().updateDatabaseModel()
 
@@ -109,7 +170,7 @@ class StationViewTab(DataViewTab):
     """
     Class for handling the table tab for station related information.
     """
-    def __init__(self, parent, database_api, selection_manager):
+    def __init__(self, parent, database_api, selection_manager, database_worker):
         buttons = StationViewTabButtons()
         DataViewTab.__init__(self, parent, buttons)
         self.selection_manager = selection_manager
@@ -130,38 +191,33 @@ class StationViewTab(DataViewTab):
                   ['Load Date', date]]
         self.database_api = database_api
         self.selection_manager = selection_manager
-        self.station_db_model = StationDatabaseModel(self, header, database_api, selection_manager)
+        self.station_db_model = StationDatabaseModel(self, header, database_api, selection_manager, database_worker)
         self.station_storage_model = StationStorageModel(self, header, self.station_db_model, selection_manager)
         self.addModels(self.station_db_model, self.station_storage_model)
+        self.addFilterBar([2, 1, 8])
 
     def addIdToSelection(self, selected_id):
         """
-        Overridden selection function
+        Overridden selection function. Clicking an already selected row removes it from the selection.
         """
-        self.selection_manager.addStationToSelection(selected_id)
+        if not self.selection_manager.removeStationFromSelection(selected_id):
+            self.selection_manager.addStationToSelection(selected_id)
         self.parent().parent().parent().parent().setSelectionText('Station')
 
     def addStationToStorage(self, station):
         """
         Function for adding a nordb Station object to the stationViewTabs model.
         """
-        data = [station.s_id,
-                station.network,
-                station.station_code,
-                station.on_date,
-                station.off_date,
-                station.latitude,
-                station.longitude,
-                station.elevation,
-                station.station_name,
-                station.station_type,
-                station.reference_station,
-                station.north_offset,
-                station.east_offset,
-                station.load_date]
+        data = self.station_db_model.stationToDataRow(station)
 
         return self.addRowToStorage(data)
 
+    def addStationsToStorage(self, stations):
+        """
+        Function for adding a list of nordb Station objects to the stationViewTabs model at once.
+        """
+        self.addRowsToStorage([self.station_db_model.stationToDataRow(stat) for stat in stations])
+
 class StationViewTabButtons(DataViewTabButtons):
     """
     Class for StationViewTab buttons.
@@ -209,8 +265,7 @@ class StationViewTabButtons(DataViewTabButtons):
                 print(e)
                 return
 
-        for s in stations:
-            self.parent().addStationToStorage(s)
+        self.parent().addStationsToStorage(stations)
 
         site_file.close()
 
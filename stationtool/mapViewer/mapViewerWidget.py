@@ -17,6 +17,7 @@ class SidePanelWidget(QWidget):
     def __init__(self, parent, selection_manager):
         super(QWidget, self).__init__(parent)
         self.setFixedWidth(600)
+        self.selection_manager = selection_manager
         self.map_view = MapViewWidget(self)
         self.selection_screen = SelectionScreen(self, selection_manager)
         self.layout = QVBoxLayout(self)
@@ -30,10 +31,19 @@ class SidePanelWidget(QWidget):
         """
         self.map_view.addStations(stations)
 
+    def updateMapView(self):
+        """
+        Highlight the selected stations on the MapViewWidget
+        """
+        self.map_view.setActiveStations(self.selection_manager.getSelectedStations())
+
 class MapViewWidget(QQuickWidget):
     """
     Class for containing the map widget
     """
+    ACTIVE_COLOR = QColor('red')
+    INACTIVE_COLOR = QColor('lightGray')
+
     def __init__(self, parent):
         super(QQuickWidget, self).__init__(parent)
         self.setFixedHeight(800)
@@ -41,6 +51,7 @@ class MapViewWidget(QQuickWidget):
         self.model = MarkerModel()
         self.active_stations = []
         self.all_stations = []
+        self.station_ids = []
         #self.model.addMarker(MapMarker(QPointF(60.171944,24.941389), 'Steissi', QColor('red')))
 
         self.context = self.rootContext()
@@ -55,6 +66,7 @@ class MapViewWidget(QQuickWidget):
         Function for adding all stations to mapViewWidget
         """
         self.model.clear()
+        self.station_ids = [stat.s_id for stat in stations]
         for stat in stations:
             self.model.addMarker(MapMarker(
                                         QPointF(stat.latitude, stat.longitude),
@@ -62,6 +74,13 @@ class MapViewWidget(QQuickWidget):
                                         QColor('red')
                                         ))
 
+    def setActiveStations(self, station_ids):
+        """
+        Function for coloring the markers of active stations red and the rest gray. All markers are red if no station is active.
+        """
+        active = set(station_ids)
+        self.model.setColors([self.ACTIVE_COLOR if not active or s_id in active else self.INACTIVE_COLOR for s_id in self.station_ids])
+
 class MapMarker(object):
     def __init__(self, position, name, color=QColor("red")):
         self._position = position
@@ -145,9 +164,21 @@ class MarkerModel(QAbstractListModel):
             return Qt.ItemIsEnabled
         return QAbstractListModel.flags(index) | Qt.ItemIsEditable
 
+    def setColors(self, colors):
+        """
+        Function for setting the colors of all markers with a single dataChanged signal
+        """
+        for marker, color in zip(self._markers, colors):
+            marker.setColor(color)
+
+        if self._markers:
+            self.dataChanged.emit(self.index(0), self.index(len(self._markers) - 1), [MarkerModel.ColorRole])
+
     def clear(self):
         """
         Function for clearing MarkerModel
         """
-        self.markers = []
+        self.beginResetModel()
+        self._markers = []
+        self.endResetModel()
 
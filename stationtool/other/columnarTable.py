@@ -0,0 +1,267 @@
+"""
+This module contains the columnar storage used by the table models of the StationTool Program
+"""
+import numpy as np
+
+NUMPY_DTYPES = {
+    int:np.int64,
+    float:np.float64,
+    bool:np.bool_
+}
+
+class ColumnarTable(object):
+    """
+    Table that stores every column as a typed NumPy array with a separate null mask. int, float and bool columns get native dtypes and other types are stored in object arrays. Appended rows are buffered and converted to arrays in bulk the next time the table is read.
+
+    The table remembers the rank of every row in the order of the last sort, so rows can be regrouped by selection without sorting them again. Sort keys of the columns are cached until the column changes.
+
+    Columns with a formatter also keep the formatted display string of every row. The strings are formatted in bulk when rows are added and again only for the cells that are set.
+
+    Rows can still be read, iterated, replaced and deleted like the lists the table models used before.
+    """
+    def __init__(self, column_types, rows = (), formatters = None):
+        self.column_types = list(column_types)
+        self.dtypes = [NUMPY_DTYPES.get(t, object) for t in self.column_types]
+        self.formatters = dict(formatters or {})
+        self._pending = []
+        self.clear()
+        self.extend(rows)
+
+    def _toArray(self, values, col):
+        """
+        Function for converting a list of values of column col into a value array and a null mask
+        """
+        nulls = np.fromiter((v is None for v in values), dtype = bool, count = len(values))
+
+        if self.dtypes[col] is object:
+            array = np.empty(len(values), dtype = object)
+            array[:] = values
+        else:
+            array = np.fromiter((0 if v is None else v for v in values), dtype = self.dtypes[col], count = len(values))
+
+        return array, nulls
+
+    def _formatValues(self, values, col):
+        """
+        Function for formatting a list of values of column col into an array of display strings. Nulls stay None.
+        """
+        formatter = self.formatters[col]
+        array = np.empty(len(values), dtype = object)
+        array[:] = [None if v is None else formatter(v) for v in values]
+        return array
+
+    def _flush(self):
+        """
+        Function for moving the buffered rows to the column arrays. New rows are ranked after all existing rows.
+        """
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = []
+
+        for col in range(len(self.columns)):
+            values = [row[col] for row in pending]
+            array, nulls = self._toArray(values, col)
+            self.columns[col] = np.concatenate((self.columns[col], array))
+            self.null_masks[col] = np.concatenate((self.null_masks[col], nulls))
+            if col in self.formatters:
+                self.display[col] = np.concatenate((self.display[col], self._formatValues(values, col)))
+
+        first = len(self.sort_rank)
+        self.sort_rank = np.concatenate((self.sort_rank, np.arange(first, first + len(pending), dtype = np.int64)))
+        self._key_cache = {}
+
+    def append(self, row):
+        """
+        Function for appending a single row
+        """
+        self._pending.append(list(row))
+
+    def extend(self, rows):
+        """
+        Function for appending many rows
+        """
+        self._pending.extend(list(row) for row in rows)
+
+    def clear(self):
+        """
+        Function for removing all rows
+        """
+        self._pending = []
+        self.columns = [np.empty(0, dtype = d) for d in self.dtypes]
+        self.null_masks = [np.zeros(0, dtype = bool) for d in self.dtypes]
+        self.sort_rank = np.zeros(0, dtype = np.int64)
+        self.display = dict((col, np.empty(0, dtype = object)) for col in self.formatters)
+        self._key_cache = {}
+
+    def setFormatter(self, col, formatter):
+        """
+        Function for setting the function that formats the values of column col for display and formatting the existing rows with it
+        """
+        self._flush()
+        self.formatters[col] = formatter
+        self.display[col] = self._formatValues([self.getValue(row, col) for row in range(len(self.columns[col]))], col)
+
+    def getDisplayValue(self, row, col):
+        """
+        Function for getting the cached display string of a cell, or its value if the column has no formatter
+        """
+        self._flush()
+        if col in self.display:
+            return self.display[col][row]
+        return self.getValue(row, col)
+
+    def getValue(self, row, col):
+        """
+        Function for getting a single value as a Python object or None if it is null
+        """
+        self._flush()
+        if self.null_masks[col][row]:
+            return None
+        value = self.columns[col][row]
+        if self.dtypes[col] is object:
+            return value
+        return value.item()
+
+    def setValue(self, row, col, value):
+        """
+        Function for setting a single value
+        """
+        self._flush()
+        if value is None:
+            self.null_masks[col][row] = True
+        else:
+            self.columns[col][row] = value
+            self.null_masks[col][row] = False
+        if col in self.formatters:
+            self.display[col][row] = None if value is None else self.formatters[col](value)
+        self._key_cache.pop(col, None)
+
+    def getRow(self, row):
+        """
+        Function for getting a row as a list of Python objects
+        """
+        return [self.getValue(row, col) for col in range(len(self.columns))]
+
+    def getColumn(self, col):
+        """
+        Function for getting the value array and the null mask of a column
+        """
+        self._flush()
+        return self.columns[col], self.null_masks[col]
+
+    def getIds(self):
+        """
+        Function for getting the first column, which holds the ids of the rows, as a list
+        """
+        self._flush()
+        return self.columns[0].tolist()
+
+    def reorder(self, order):
+        """
+        Function for reordering every column, the ranks and the cached sort keys with an index array
+        """
+        self._flush()
+        self.columns = [c[order] for c in self.columns]
+        self.null_masks = [m[order] for m in self.null_masks]
+        self.sort_rank = self.sort_rank[order]
+        self.display = dict((col, strings[order]) for col, strings in self.display.items())
+        self._key_cache = dict((col, (key[order], nulls[order])) for col, (key, nulls) in self._key_cache.items())
+
+    def selectionMask(self, selected_ids):
+        """
+        Function for getting a boolean array that is True on the rows whose id is in selected_ids
+        """
+        self._flush()
+        if not selected_ids:
+            return np.zeros(len(self.columns[0]), dtype = bool)
+        return np.isin(self.columns[0], np.fromiter(selected_ids, dtype = self.columns[0].dtype, count = len(selected_ids)))
+
+    def sortKey(self, col):
+        """
+        Function for getting the cached sort key and null mask of a column. Numeric columns are their own keys and other columns are replaced with the ranks of their distinct values.
+        """
+        self._flush()
+
+        if col not in self._key_cache:
+            values, nulls = self.columns[col], self.null_masks[col]
+
+            if self.dtypes[col] is object:
+                key = np.zeros(len(values), dtype = np.int64)
+                if (~nulls).any():
+                    key[~nulls] = np.unique(values[~nulls], return_inverse = True)[1].ravel()
+            else:
+                key = values.astype(np.float64)
+                key[nulls] = 0
+
+            self._key_cache[col] = (key, nulls)
+
+        return self._key_cache[col]
+
+    def _groupBySelection(self, order, selected_ids):
+        """
+        Function for moving the selected rows of order in front of the others while keeping their relative order
+        """
+        selected = self.selectionMask(selected_ids)[order]
+        return np.concatenate((order[selected], order[~selected]))
+
+    def sortRows(self, sort_columns, selected_ids = ()):
+        """
+        Function for sorting the rows with a stable multi-column sort. sort_columns is a list of (column, descending) tuples, the first being the primary key. Nulls are sorted last in both directions and the rows in selected_ids are placed first.
+        """
+        self._flush()
+        if len(self.columns[0]) == 0:
+            return
+
+        keys = []
+        for col, descending in reversed(sort_columns):
+            key, nulls = self.sortKey(col)
+            keys.append(-key if descending else key)
+            keys.append(nulls)
+
+        order = np.lexsort(keys)
+
+        rank = np.empty(len(order), dtype = np.int64)
+        rank[order] = np.arange(len(order), dtype = np.int64)
+        self.sort_rank = rank
+
+        self.reorder(self._groupBySelection(order, selected_ids))
+
+    def groupRows(self, selected_ids):
+        """
+        Function for regrouping the rows by selection after the selection has changed. The rows are placed in the order of the last sort with the selected rows first, without sorting again.
+        """
+        self._flush()
+        if len(self.columns[0]) == 0:
+            return
+
+        by_rank = np.empty(len(self.sort_rank), dtype = np.int64)
+        by_rank[self.sort_rank] = np.arange(len(self.sort_rank), dtype = np.int64)
+
+        self.reorder(self._groupBySelection(by_rank, selected_ids))
+
+    def __len__(self):
+        return len(self.columns[0]) + len(self._pending)
+
+    def __getitem__(self, row):
+        return self.getRow(row)
+
+    def __setitem__(self, row, values):
+        self._flush()
+        for col, value in enumerate(values):
+            self.setValue(row, col, value)
+
+    def __delitem__(self, row):
+        self._flush()
+        removed_rank = self.sort_rank[row]
+        self.columns = [np.delete(c, row) for c in self.columns]
+        self.null_masks = [np.delete(m, row) for m in self.null_masks]
+        self.sort_rank = np.delete(self.sort_rank, row)
+        self.display = dict((col, np.delete(strings, row)) for col, strings in self.display.items())
+        self.sort_rank[self.sort_rank > removed_rank] -= 1
+        self._key_cache = {}
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.getRow(row)
@@ -0,0 +1,163 @@
+"""
+This module contains a class for pooling the database connections of the StationTool Program
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+from nordb.core.usernameUtilities import log2nordb
+
+class ConnectionPool(object):
+    """
+    Class that keeps a bounded amount of open database connections, each with its own reusable cursor.
+    """
+    def __init__(self, size = 4, health_check_interval = 30.0, acquire_listener = None):
+        if size < 1:
+            raise Exception("ERROR: Connection pool size has to be at least 1, received {0}".format(size))
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.acquire_listener = acquire_listener
+        self._idle = []
+        self._open_count = 0
+        self._condition = threading.Condition()
+
+    def _openConnection(self):
+        """
+        Function for opening a new pooled connection and its cursor
+        """
+        db_conn = log2nordb()
+        db_conn.autocommit = True
+        return [db_conn, db_conn.cursor(), time.time()]
+
+    def _isHealthy(self, entry):
+        """
+        Function for checking if a idle connection is still usable. Connections that have been idle longer than health_check_interval are pinged.
+        """
+        db_conn, cur, last_used = entry
+
+        if db_conn.closed or cur.closed:
+            return False
+
+        if time.time() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            cur.execute("SELECT 1")
+            cur.fetchall()
+        except Exception:
+            return False
+
+        return True
+
+    def _discard(self, entry):
+        """
+        Function for closing a broken connection and freeing its slot in the pool
+        """
+        try:
+            entry[0].close()
+        except Exception:
+            pass
+        self._open_count -= 1
+
+    def acquire(self):
+        """
+        Function for getting a connection and cursor from the pool. Blocks if all connections are in use. The time spent waiting is reported to acquire_listener.
+        """
+        start = time.time()
+        db_conn, cur = self._acquire()
+        if self.acquire_listener is not None:
+            self.acquire_listener(time.time() - start)
+        return db_conn, cur
+
+    def _acquire(self):
+        """
+        Function for taking a healthy idle connection or opening a new one
+        """
+        with self._condition:
+            while True:
+                while self._idle:
+                    entry = self._idle.pop()
+                    if self._isHealthy(entry):
+                        return entry[0], entry[1]
+                    self._discard(entry)
+
+                if self._open_count < self.size:
+                    self._open_count += 1
+                    break
+
+                self._condition.wait()
+
+        try:
+            entry = self._openConnection()
+        except Exception:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
+            raise
+
+        return entry[0], entry[1]
+
+    def release(self, db_conn, cur):
+        """
+        Function for returning a connection and cursor back to the pool
+        """
+        with self._condition:
+            entry = [db_conn, cur, time.time()]
+            if db_conn.closed or cur.closed:
+                self._discard(entry)
+            else:
+                if not db_conn.autocommit:
+                    db_conn.rollback()
+                    db_conn.autocommit = True
+                self._idle.append(entry)
+            self._condition.notify()
+
+    @contextmanager
+    def cursor(self):
+        """
+        Context manager for borrowing a pooled cursor for the duration of a with block
+        """
+        db_conn, cur = self.acquire()
+        try:
+            yield cur
+        finally:
+            self.release(db_conn, cur)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager for running a with block in a single transaction. The transaction is committed when the block finishes and rolled back if it raises.
+        """
+        db_conn, cur = self.acquire()
+        try:
+            db_conn.autocommit = False
+            yield cur
+            db_conn.commit()
+        finally:
+            self.release(db_conn, cur)
+
+    @contextmanager
+    def serverCursor(self, name, itersize = 2000):
+        """
+        Context manager for borrowing a named server-side cursor. The rows of a query executed with it stay on the server until they are fetched, so large results can be read in chunks.
+        """
+        db_conn, cur = self.acquire()
+        try:
+            db_conn.autocommit = False
+            server_cur = db_conn.cursor(name)
+            server_cur.itersize = itersize
+            try:
+                yield server_cur
+            finally:
+                server_cur.close()
+        finally:
+            self.release(db_conn, cur)
+
+    def closeAll(self):
+        """
+        Function for closing all idle connections of the pool
+        """
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._condition.notify_all()
@@ -2,9 +2,10 @@
 This module contains a class for handling all database calls of the StationTool Program
 """
 import time
+import threading
+from collections import namedtuple
 
 from nordb.database.sql2station import getAllStations
-from nordb.database.sql2instrument import getAllInstruments
 from nordb.database.networks import getNetworks
 from nordb.database.station2sql import insertStation2Database
 from nordb.database.sitechan2sql import insertSiteChan2Database
@@ -12,673 +13,1050 @@ from nordb.database.sensor2sql import insertSensor2Database
 from nordb.database.instrument2sql import insertInstrument2Database
 from nordb.database.response2sql import insertResponse2Database
 from nordb.database.norDBManagement import databaseIsRunning
-from nordb.core.usernameUtilities import log2nordb
+from nordb.nordic.station import Station
+from nordb.nordic.sitechan import SiteChan
+from nordb.nordic.sensor import Sensor
+from nordb.nordic.instrument import Instrument
+from psycopg2.extras import execute_values
+
+from other.connectionPool import ConnectionPool
+from other.inventoryGraph import InventoryGraph
+from other.lruCache import LruCache
+from other.queryStats import QueryStats, instrumented
+from other.lazyResponse import ResponseStub, DatabaseResponse, isStub, responseSize
+from other.inventoryCacheFile import InventoryCacheFile, DEFAULT_INVENTORY_CACHE_PATH
+from other.inventoryStore import InventoryStore
+
+STATION_COLUMNS = [ 'station_code', 'on_date', 'off_date', 'latitude', 'longitude', 'elevation',
+                    'station_name', 'station_type', 'reference_station', 'north_offset', 'east_offset', 'load_date']
+SITECHAN_COLUMNS = [   'channel_code', 'on_date', 'off_date', 'channel_type', 'emplacement_depth', 'horizontal_angle',
+                        'vertical_angle', 'description', 'load_date']
+SENSOR_COLUMNS = ['time', 'endtime', 'calratio', 'calper', 'tshift', 'instant', 'lddate']
+INSTRUMENT_COLUMNS = [  'instrument_name', 'instrument_type', 'band', 'digital', 'samprate', 'ncalib',
+                        'ncalper', 'resp_dir', 'dfile', 'rsptype', 'lddate', 'response_id']
+RESPONSE_COLUMNS = ['file_name', 'source', 'stage', 'description', 'format', 'author']
+INSTRUMENT_QUERY = (   """
+                    SELECT
+                        instrument.id, {0}, response.file_name, response.format
+                    FROM
+                        instrument LEFT JOIN response ON response.id = instrument.response_id
+                    """).format(', '.join('instrument.' + col for col in INSTRUMENT_COLUMNS))
+
+SENSOR_PAGE_COLUMNS = [ 'sensor.id', 'station.station_code', 'sitechan.channel_code', 'sensor.time', 'sensor.endtime',
+                        'sensor.calratio', 'sensor.calper', 'sensor.tshift', 'sensor.instant', 'sensor.lddate']
+PAGE_FILTER_OPERATORS = ['=', '<', '<=', '>', '>=', 'prefix', 'contains']
+
+InventorySnapshot = namedtuple('InventorySnapshot', ['stations', 'sitechans', 'sensors', 'instruments'])
 
 class DatabaseApi(object):
     """
     Class that handles all database calls for the StationTool Program.
     """
-    def __init__(self):
+    CLOSURE_KINDS = ('station', 'sitechan', 'sensor', 'instrument')
+    CLOSURE_SEED_COLUMNS = {
+        'station':'sitechan.station_id',
+        'sitechan':'sitechan.id',
+        'sensor':'sensor.id',
+        'instrument':'sensor.instrument_id'
+    }
+
+    def __init__(self, pool_size = 4, snapshot_cache_size = 64, slow_query_threshold = 0.5, response_cache_bytes = 32 * 1024 * 1024,
+                 inventory_cache_path = DEFAULT_INVENTORY_CACHE_PATH):
         if not databaseIsRunning():
             raise Exception("ERROR: Database is not running! Please see if database is actually running or if your database has been configured correctly with nordb")
-        self.stations = []
-        self.sitechans = []
-        self.sensors = []
-        self.instruments = []
-        self.responses = []
+        self.query_stats = QueryStats(slow_query_threshold)
+        self.connection_pool = ConnectionPool(pool_size, acquire_listener = self.query_stats.addAcquireTime)
+        self.inventory_store = InventoryStore()
+        self.instruments_loaded = False
+        self.instruments_by_id = {}
+        self.instruments_by_dfile = {}
+        self.responses_by_id = {}
+        self.inventory_graph = None
+        self.snapshot_cache = LruCache(snapshot_cache_size)
+        self.response_cache = LruCache(65536, response_cache_bytes, responseSize)
+        self.inventory_loaded = False
+        self.inventory_lock = threading.RLock()
+        if inventory_cache_path is None:
+            self.inventory_cache = None
+        else:
+            self.inventory_cache = InventoryCacheFile(inventory_cache_path)
 
-    def insertStation(self, station):
+    @property
+    def stations(self):
         """
-        Insert station to the database
+        Read-only view of the stations in the shared inventory store
         """
-        insertStation2Database(station)
+        return self.inventory_store.getStations()
 
-    def insertSitechan(self, sitechan):
+    @property
+    def sitechans(self):
         """
-        Insert sitechans to the database
+        Read-only view of the sitechans in the shared inventory store
         """
-        insertSitechan2Database(sitechan)
+        return self.inventory_store.getSitechans()
 
-    def insertSensor(self, sensor):
+    @property
+    def sensors(self):
         """
-        Insert sensor to the database
+        Read-only view of the sensors in the shared inventory store
         """
-        insertSensor2Database(sensor)
+        return self.inventory_store.getSensors()
 
-    def insertInstrument(self, instrument):
+    @property
+    def instruments(self):
         """
-        Insert instrument to the database
+        Read-only view of the instruments in the shared inventory store
         """
-        insertInstrument2Database(instrument)
+        return self.inventory_store.getInstruments()
 
-    def insertResponse(self, response):
+    def _fetchIds(self, query, params):
         """
-        Insert response to the database.
+        Function for executing a query with a pooled cursor and returning the first column of every row
         """
-        if response.response_id == -1:
-            insertResponse2Database(response)
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, params)
+            return [a[0] for a in cur.fetchall()]
 
-    def getNetworks(self):
+    def close(self):
         """
-        Returns all networks to user
+        Function for closing all pooled database connections
         """
-        return getNetworks()
+        self.connection_pool.closeAll()
 
-    def getStations(self):
+    def _indexInstruments(self, instruments):
         """
-        Return all stations from the database
+        Function for adding instruments and their responses to the i_id, dfile and response_id indexes
         """
-        self.stations = getAllStations()
-        return self.stations
+        for ins in instruments:
+            self.instruments_by_id[ins.i_id] = ins
+            self.instruments_by_dfile[ins.dfile] = ins
+            if getattr(ins, 'response', None) is not None:
+                self.responses_by_id[ins.response.response_id] = ins.response
 
-    def getSitechans(self):
+    def _instrumentFromRow(self, row, ins = None):
         """
-        Returns all sitechans from the database
+        Function for filling an instrument from a row of INSTRUMENT_QUERY. The response is attached as a stub unless it is already known.
         """
-        self.sitechans = []
+        if ins is None:
+            ins = Instrument()
+        ins.i_id = row[0]
+        for col, value in zip(INSTRUMENT_COLUMNS, row[1:]):
+            setattr(ins, col, value)
 
-        if len(self.stations) == 0:
-            self.getStations()
+        ins.response = self.responses_by_id.get(ins.response_id)
+        if ins.response is None and ins.response_id not in (None, -1):
+            ins.response = ResponseStub(ins.response_id, row[-2], row[-1])
 
-        for stat in self.stations:
-            for chan in stat.sitechans:
-                self.sitechans.append(chan)
+        return ins
 
-        return self.sitechans
-
-    def getSensors(self):
+    def _loadInstruments(self):
         """
-        Return all sensors from the database
+        Function for loading all instruments once before they are looked up from the indexes
         """
-        self.sensors = []
-
-        if len(self.sitechans) == 0:
-            self.getSitechans()
-
-        for chan in self.sitechans:
-            for sen in chan.sensors:
-                self.sensors.append(sen)
-
-        return self.sensors
+        with self.inventory_lock:
+            if not self.instruments_loaded:
+                self.getInstruments()
 
-    def getInstruments(self):
+    def hasInventoryCache(self):
         """
-        Return all instruments from the database.
+        Function for checking if the inventory can be warm started from the local cache file
         """
-        self.instruments = getAllInstruments()
+        return self.inventory_cache is not None and self.inventory_cache.exists()
 
-        return self.instruments
+    @instrumented
+    def getInventorySignature(self):
+        """
+        Function for getting the row count, max id and max load date of the station, sitechan, sensor and instrument tables. The cache file is valid while the signature does not change.
+        """
+        query = """
+                SELECT
+                    (SELECT count(*) FROM station), (SELECT max(id) FROM station), (SELECT max(load_date) FROM station),
+                    (SELECT count(*) FROM sitechan), (SELECT max(id) FROM sitechan), (SELECT max(load_date) FROM sitechan),
+                    (SELECT count(*) FROM sensor), (SELECT max(id) FROM sensor), (SELECT max(lddate) FROM sensor),
+                    (SELECT count(*) FROM instrument), (SELECT max(id) FROM instrument), (SELECT max(lddate) FROM instrument)
+                """
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query)
+            row = cur.fetchone()
+
+        return {
+            'station':tuple(row[0:3]),
+            'sitechan':tuple(row[3:6]),
+            'sensor':tuple(row[6:9]),
+            'instrument':tuple(row[9:12])
+        }
+
+    @instrumented
+    def loadInventory(self):
+        """
+        Function for loading all stations and instruments once. If the local cache file exists, it is read and only the station, sitechan, sensor and instrument rows changed in the database after it was written are fetched and patched into the cached inventory. Returns the stations. The inventory_lock is held while loading, so concurrent callers wait for the first load instead of loading again.
+        """
+        with self.inventory_lock:
+            return self._loadInventory()
 
-    def getResponse(self, instrument_id):
+    def _loadInventory(self):
         """
-        Function for getting a single response from the database
+        Function for loading the inventory with the inventory_lock held
         """
-        if len(self.instruments) == 0:
+        if self.inventory_loaded:
+            return self.stations
+
+        signature = self.getInventorySignature()
+        cached = None
+        if self.inventory_cache is not None:
+            cached = self.inventory_cache.load()
+
+        if cached is None:
+            self.getStations()
+            self.getInstruments()
+            if self.inventory_cache is not None:
+                self.inventory_cache.save(signature, self.stations, self.instruments)
+            self.inventory_loaded = True
+            return self.stations
+
+        cached_signature, stations, instruments = cached
+        changed_instruments = []
+        full_instruments = False
+
+        self.inventory_store.setStations(stations)
+        self.inventory_graph = InventoryGraph(self.stations)
+        self.invalidateSnapshots()
+        self.inventory_store.setInstruments(instruments)
+        self.instruments_loaded = True
+        self.instruments_by_id = {}
+        self.instruments_by_dfile = {}
+        self._indexInstruments(self.instruments)
+
+        if cached_signature['instrument'] != signature['instrument']:
+            changed_instruments = self.getInstrumentsSince(cached_signature['instrument'][1] or -1, cached_signature['instrument'][2])
+            full_instruments = len(self.instruments) != signature['instrument'][0]
+        if full_instruments:
             self.getInstruments()
 
-        for ins in self.instruments:
-            if ins.i_id == instrument_id:
-                return ins.response
+        changed_stations = self._refreshStationTree(cached_signature, signature)
+        full_stations = (   len(self.stations) != signature['station'][0] or
+                            len(self.sitechans) != signature['sitechan'][0] or
+                            len(self.sensors) != signature['sensor'][0])
+        if full_stations:
+            self.getStations()
+
+        if full_stations or full_instruments:
+            self.inventory_cache.save(signature, self.stations, self.instruments)
+        elif changed_stations or changed_instruments:
+            self.inventory_cache.update(signature, changed_stations, changed_instruments)
 
-        return None
+        self.inventory_loaded = True
+        return self.stations
 
-    def getStationIdsFromSitechans(self, sitechan_ids, selected_datetime):
+    def _refreshStationTree(self, cached_signature, signature):
         """
-        Function for getting a list of station_ids from sitechan_ids
+        Function for fetching the stations, sitechans and sensors changed after cached_signature was taken and patching them into the station tree. Returns the stations whose trees have changed.
         """
-        if not sitechan_ids:
-            return []
+        changed = {}
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if cached_signature['station'] != signature['station']:
+            changed.update((stat.s_id, stat) for stat in
+                           self.getStationsSince(cached_signature['station'][1] or -1, cached_signature['station'][2]))
+        if cached_signature['sitechan'] != signature['sitechan']:
+            changed.update((stat.s_id, stat) for stat in
+                           self.getSitechansSince(cached_signature['sitechan'][1] or -1, cached_signature['sitechan'][2]))
+        if cached_signature['sensor'] != signature['sensor']:
+            changed.update((stat.s_id, stat) for stat in
+                           self.getSensorsSince(cached_signature['sensor'][1] or -1, cached_signature['sensor'][2]))
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan
-                    WHERE
-                        sitechan.id IN %s
-                    """)
-            cur.execute(query, (tuple(sitechan_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan
-                    WHERE
-                        sitechan.id IN %(sitechan_ids)s
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-            cur.execute(query, {'sitechan_ids':tuple(sitechan_ids), 's_datetime':selected_datetime})
+        return list(changed.values())
 
-        return_ids = [a[0] for a in cur.fetchall()]
+    def _storeStationTree(self, changed_stations):
+        """
+        Function for taking a station tree that has been patched in place into use and writing the changed stations to the cache file
+        """
+        self.inventory_store.setStations(self.stations)
+        self.inventory_graph = InventoryGraph(self.stations)
+        self.invalidateSnapshots()
+        self._updateInventoryCache(stations = changed_stations)
 
-        db_conn.close()
+    def loadInventoryInstruments(self):
+        """
+        Function for loading the inventory with loadInventory and returning the instruments
+        """
+        self.loadInventory()
+        return self.instruments
 
-        return return_ids
+    def _updateInventoryCache(self, stations = (), instruments = ()):
+        """
+        Function for writing rows refreshed from the database to the cache file once the inventory has been loaded
+        """
+        if self.inventory_loaded and self.inventory_cache is not None and (stations or instruments):
+            self.inventory_cache.update(self.getInventorySignature(), stations, instruments)
 
-    def getStationIdsFromSensors(self, sensor_ids, selected_datetime):
+    def stats(self):
         """
-        Function for getting a list of station_ids from sensor_ids
+        Function for getting the call count, errors, total, mean and max wall time, returned rows and connection acquisition time of every database call
         """
-        if not sensor_ids:
-            return []
+        return self.query_stats.summary()
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+    def getSlowQueries(self):
+        """
+        Function for getting the database calls that took longer than the slow query threshold
+        """
+        return self.query_stats.getSlowQueries()
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        sensor.id IN %s
-                    AND
-                        sensor.sitechan_id = sitechan.id
-                    """)
-            cur.execute(query, (tuple(sensor_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        sensor.id IN %(sensor_ids)s
-                    AND
-                        sensor.sitechan_id = sitechan.id
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-            cur.execute(query, {'sensor_ids':tuple(sensor_ids), 's_datetime':selected_datetime})
+    def resetStats(self):
+        """
+        Function for clearing all collected database call statistics
+        """
+        self.query_stats.reset()
 
-        return_ids = [a[0] for a in cur.fetchall()]
+    def invalidateSnapshots(self):
+        """
+        Function for dropping all cached active inventory snapshots. Call this whenever the inventory in the database changes.
+        """
+        self.snapshot_cache.clear()
 
-        db_conn.close()
+    @instrumented
+    def insertStation(self, station):
+        """
+        Insert station to the database
+        """
+        insertStation2Database(station)
+        self.invalidateSnapshots()
 
-        return return_ids
+    @instrumented
+    def insertSitechan(self, sitechan):
+        """
+        Insert sitechans to the database
+        """
+        insertSitechan2Database(sitechan)
+        self.invalidateSnapshots()
 
-    def getStationIdsFromInstruments(self, instrument_ids, selected_datetime):
+    @instrumented
+    def insertSensor(self, sensor):
         """
-        Function for getting a list of station_ids from instrument_ids
+        Insert sensor to the database
         """
-        if not instrument_ids:
-            return []
+        insertSensor2Database(sensor)
+        self.invalidateSnapshots()
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+    @instrumented
+    def insertInstrument(self, instrument):
+        """
+        Insert instrument to the database
+        """
+        insertInstrument2Database(instrument)
+        self.inventory_store.addInstruments([instrument])
+        self._indexInstruments([instrument])
+        self.invalidateSnapshots()
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        sensor.sitechan_id = sitechan.id
-                    AND
-                        sensor.instrument_id IN %s
-                    """)
-            cur.execute(query, (tuple(instrument_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(station_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        sensor.sitechan_id = sitechan.id
-                    AND
-                        sensor.instrument_id IN %(instrument_ids)s
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-            cur.execute(query, {'instrument_ids':tuple(instrument_ids), 's_datetime':selected_datetime})
+    @instrumented
+    def insertResponse(self, response):
+        """
+        Insert response to the database.
+        """
+        if response.response_id == -1:
+            insertResponse2Database(response)
 
-        return_ids = [a[0] for a in cur.fetchall()]
+    @instrumented
+    def insertStations(self, stations):
+        """
+        Insert a list of stations to the database with multi-row inserts in a single transaction. Either all stations are inserted or none. The new ids are written to the s_id of the stations.
+        """
+        if not stations:
+            return
 
-        db_conn.close()
+        query = (   """
+                INSERT INTO
+                    station (network_id, {0})
+                VALUES
+                    %s
+                RETURNING
+                    id
+                """).format(', '.join(STATION_COLUMNS))
+        template = "((SELECT id FROM network WHERE network = %s), {0})".format(', '.join(['%s'] * len(STATION_COLUMNS)))
+
+        with self.connection_pool.transaction() as cur:
+            ids = execute_values(cur, query,
+                                 [[stat.network] + [getattr(stat, col) for col in STATION_COLUMNS] for stat in stations],
+                                 template = template, fetch = True)
+
+        for stat, s_id in zip(stations, ids):
+            stat.s_id = s_id[0]
+
+        self.invalidateSnapshots()
+
+    def insertInstruments(self, instruments):
+        """
+        Insert a list of instruments to the database with multi-row inserts in a single transaction. Either all instruments are inserted or none.
+        """
+        self.insertInstrumentsWithResponses(instruments, [])
 
-        return return_ids
+    def insertResponses(self, responses):
+        """
+        Insert a list of responses to the database in a single transaction. Responses that already have a response_id are skipped. Either all responses are inserted or none.
+        """
+        self.insertInstrumentsWithResponses([], responses)
 
-    def getSitechanIdsFromStations(self, station_ids, selected_datetime):
+    @instrumented
+    def insertInstrumentsWithResponses(self, instruments, responses):
+        """
+        Insert new responses and the instruments using them to the database in a single transaction. Instruments without a response_id get the id of the response matching their dfile. The new ids are written to the objects only after the transaction has been committed.
+        """
+        new_responses = [resp for resp in responses if resp.response_id == -1]
+        instrument_ids = []
+
+        if not instruments and not new_responses:
+            return
+
+        with self.connection_pool.transaction() as cur:
+            response_ids = self._insertResponses(cur, new_responses)
+
+            dfile_ids = dict((resp.file_name, resp.response_id) for resp in responses)
+            dfile_ids.update((resp.file_name, r_id) for resp, r_id in zip(new_responses, response_ids))
+
+            rows = []
+            for ins in instruments:
+                row = [getattr(ins, col, None) for col in INSTRUMENT_COLUMNS]
+                if row[-1] in (None, -1):
+                    row[-1] = dfile_ids.get(ins.dfile, -1)
+                rows.append(row)
+
+            if rows:
+                query = (   """
+                        INSERT INTO
+                            instrument ({0})
+                        VALUES
+                            %s
+                        RETURNING
+                            id
+                        """).format(', '.join(INSTRUMENT_COLUMNS))
+                instrument_ids = execute_values(cur, query, rows, fetch = True)
+
+        for resp, r_id in zip(new_responses, response_ids):
+            resp.response_id = r_id
+            self.responses_by_id[r_id] = resp
+
+        for ins, row, i_id in zip(instruments, rows, instrument_ids):
+            ins.response_id = row[-1]
+            ins.i_id = i_id[0]
+            if getattr(ins, 'response', None) is None:
+                ins.response = self.responses_by_id.get(ins.response_id)
+
+        self.inventory_store.addInstruments(instruments)
+        self._indexInstruments(instruments)
+
+        self.invalidateSnapshots()
+
+    def _insertResponses(self, cur, responses):
         """
-        Function for getting a list of sitechan_ids from station_ids
+        Function for inserting responses with their paz or fap data using cur. Returns the new response ids in the same order as responses.
         """
-        if not station_ids:
+        if not responses:
             return []
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
-
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(id)
-                    FROM
-                        sitechan
-                    WHERE
-                        station_id IN %s
-                    """)
-            cur.execute(query, (tuple(station_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(id)
-                    FROM
-                        sitechan
-                    WHERE
-                        station_id IN %(station_ids)s
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-            cur.execute(query, {'station_ids':tuple(station_ids), 's_datetime':selected_datetime})
+        query = (   """
+                INSERT INTO
+                    response ({0})
+                VALUES
+                    %s
+                RETURNING
+                    id
+                """).format(', '.join(RESPONSE_COLUMNS))
+        response_ids = [r[0] for r in execute_values(cur, query,
+                        [[resp.file_name, resp.source, resp.stage, resp.description, resp.response_format, resp.author] for resp in responses],
+                        fetch = True)]
+
+        paz_responses = [(resp, r_id) for resp, r_id in zip(responses, response_ids) if resp.response_format == 'paz']
+        fap_responses = [(resp, r_id) for resp, r_id in zip(responses, response_ids) if resp.response_format == 'fap']
+
+        if paz_responses:
+            paz_ids = execute_values(cur, "INSERT INTO paz_response (response_id, scale_factor) VALUES %s RETURNING id",
+                                     [[r_id, resp.scale_factor] for resp, r_id in paz_responses],
+                                     fetch = True)
+
+            poles = []
+            zeros = []
+            for (resp, r_id), paz_id in zip(paz_responses, paz_ids):
+                poles.extend([paz_id[0]] + list(pole[:4]) for pole in resp.poles)
+                zeros.extend([paz_id[0]] + list(zero[:4]) for zero in resp.zeros)
+
+            if poles:
+                execute_values(cur, "INSERT INTO pole (paz_id, real, imag, real_error, imag_error) VALUES %s", poles)
+            if zeros:
+                execute_values(cur, "INSERT INTO zero (paz_id, real, imag, real_error, imag_error) VALUES %s", zeros)
+
+        if fap_responses:
+            fap_ids = execute_values(cur, "INSERT INTO fap_response (response_id) VALUES %s RETURNING id",
+                                     [[r_id] for resp, r_id in fap_responses],
+                                     fetch = True)
+
+            faps = []
+            for (resp, r_id), fap_id in zip(fap_responses, fap_ids):
+                faps.extend([fap_id[0]] + list(fap[:5]) for fap in resp.fap)
+
+            if faps:
+                execute_values(cur, "INSERT INTO fap (fap_id, frequency, amplitude, phase, amplitude_error, phase_error) VALUES %s", faps)
+
+        return response_ids
+
+    @instrumented
+    def getNetworks(self):
+        """
+        Returns all networks to user
+        """
+        return getNetworks()
 
-        return_ids = [a[0] for a in cur.fetchall()]
+    @instrumented
+    def getStations(self):
+        """
+        Return all stations from the database
+        """
+        self.inventory_store.setStations(getAllStations())
+        self.inventory_graph = InventoryGraph(self.stations)
+        self.invalidateSnapshots()
+        return self.stations
 
-        db_conn.close()
+    @instrumented
+    def getSitechans(self):
+        """
+        Returns all sitechans from the database
+        """
+        self.loadInventory()
 
-        return return_ids
+        return self.sitechans
 
-    def getSitechanIdsFromSensors(self, sensor_ids, selected_datetime):
+    @instrumented
+    def getSensors(self):
         """
-        Function for getting a list of sitechan_ids from sensor_ids
+        Return all sensors from the database
         """
-        if not sensor_ids:
-            return []
+        self.loadInventory()
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        return self.sensors
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sitechan_id)
-                    FROM
-                        sensor
-                    WHERE
-                        id IN %s
-                    """)
-            cur.execute(query, (tuple(sensor_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sitechan_id)
-                    FROM
-                        sensor
-                    WHERE
-                        id IN %(sensor_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
-            cur.execute(query, {'sensor_ids':tuple(sensor_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
-        return_ids = [a[0] for a in cur.fetchall()]
+    @instrumented
+    def getInstruments(self):
+        """
+        Return all instruments from the database. The responses of the instruments are stubs that are loaded with loadResponse when needed.
+        """
+        with self.connection_pool.cursor() as cur:
+            cur.execute(INSTRUMENT_QUERY)
+            rows = cur.fetchall()
 
-        db_conn.close()
+        self.inventory_store.setInstruments([self._instrumentFromRow(row) for row in rows])
+        self.instruments_loaded = True
+        self.instruments_by_id = {}
+        self.instruments_by_dfile = {}
+        self._indexInstruments(self.instruments)
 
-        return return_ids
+        return self.instruments
 
-    def getSitechanIdsFromInstruments(self, instrument_ids, selected_datetime):
+    def _streamRows(self, name, query, params, chunk_size):
         """
-        Function for getting a list of sitechan_ids from instrument_ids
+        Generator for reading the rows of query through a named server-side cursor chunk_size rows at a time
         """
-        if not instrument_ids:
-            return []
+        with self.connection_pool.serverCursor(name, chunk_size) as cur:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    @instrumented
+    def streamStations(self, chunk_size = 500):
+        """
+        Generator for reading all stations from the database in chunks of chunk_size. Yields lists of stations without their sitechans, so the station table can be filled before the whole inventory is loaded.
+        """
+        query = (   """
+                SELECT
+                    station.id, network.network, {0}
+                FROM
+                    station, network
+                WHERE
+                    station.network_id = network.id
+                ORDER BY
+                    station.id
+                """).format(', '.join('station.' + col for col in STATION_COLUMNS))
+
+        for rows in self._streamRows('stream_stations', query, {}, chunk_size):
+            stations = []
+            for row in rows:
+                stat = Station()
+                stat.s_id = row[0]
+                stat.network = row[1]
+                for col, value in zip(STATION_COLUMNS, row[2:]):
+                    setattr(stat, col, value)
+                stat.sitechans = []
+                stations.append(stat)
+            yield stations
+
+    @instrumented
+    def streamInstruments(self, chunk_size = 500):
+        """
+        Generator for reading all instruments from the database in chunks of chunk_size. Yields lists of instruments with response stubs.
+        """
+        query = INSTRUMENT_QUERY + " ORDER BY instrument.id"
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        for rows in self._streamRows('stream_instruments', query, {}, chunk_size):
+            yield [self._instrumentFromRow(row) for row in rows]
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sitechan_id)
-                    FROM
-                        sensor
-                    WHERE
-                        instrument_id IN %s
-                    """)
-            cur.execute(query, (tuple(instrument_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sitechan_id)
-                    FROM
-                        sensor
-                    WHERE
-                        instrument_id IN %(instrument_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
+    def _pageFilterClause(self, columns, filters, params):
+        """
+        Function for building the WHERE conditions of a paged query from a list of (column, operator, value) filters. Columns are indexes to columns or lists of them, in which case a row matches if any of the columns matches, and operators are one of PAGE_FILTER_OPERATORS.
+        """
+        conditions = []
 
-            cur.execute(query, {'instrument_ids':tuple(instrument_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
+        for i, (col, operator, value) in enumerate(filters):
+            if operator not in PAGE_FILTER_OPERATORS:
+                raise Exception("ERROR: Unknown filter operator {0}".format(operator))
+            name = 'filter_{0}'.format(i)
+            filter_columns = col if isinstance(col, (list, tuple)) else [col]
 
-        return_ids = [a[0] for a in cur.fetchall()]
+            if operator == 'prefix':
+                condition = "{0}::text ILIKE %({1})s"
+                params[name] = value.replace('%', '\\%').replace('_', '\\_') + '%'
+            elif operator == 'contains':
+                condition = "{0}::text ILIKE %({1})s"
+                params[name] = '%' + value.replace('%', '\\%').replace('_', '\\_') + '%'
+            else:
+                condition = "{0} " + operator + " %({1})s"
+                params[name] = value
 
-        db_conn.close()
+            conditions.append("(" + " OR ".join(condition.format(columns[c], name) for c in filter_columns) + ")")
 
-        return return_ids
+        return conditions
 
-    def getSensorIdsFromStations(self, station_ids, selected_datetime):
+    def _pageKeysetClause(self, columns, order_column, descending, after, params):
         """
-        Function for getting a list of sensor_ids from station_ids
+        Function for building the keyset condition that continues a paged query after the row with the (order value, id) key after. Rows are ordered by the order column with nulls last and by id.
         """
-        if not station_ids:
+        if after is None:
             return []
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
-
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor, sitechan
-                    WHERE
-                        station_id IN %s
-                    AND
-                        sensor.sitechan_id = sitechan.id
-                    """)
-            cur.execute(query, (tuple(station_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor, sitechan
-                    WHERE
-                        station_id IN %(station_ids)s
-                    AND
-                        sensor.sitechan_id = sitechan.id
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-
-            cur.execute(query, {'station_ids':tuple(station_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
+        last_value, last_id = after
+        params['last_value'] = last_value
+        params['last_id'] = last_id
+        column = columns[order_column]
 
-        return_ids = [a[0] for a in cur.fetchall()]
+        if last_value is None:
+            return ["({0} IS NULL AND {1} > %(last_id)s)".format(column, columns[0])]
 
-        db_conn.close()
+        return ["({0} {1} %(last_value)s OR ({0} = %(last_value)s AND {2} > %(last_id)s) OR {0} IS NULL)".format(
+                column, '<' if descending else '>', columns[0])]
 
-        return return_ids
-
-    def getSensorIdsFromSitechans(self, sitechan_ids, selected_datetime):
+    @instrumented
+    def getSensorPage(self, order_column = 0, descending = False, after = None, limit = 200, filters = ()):
         """
-        Function for getting a list of sensor_ids from sitechan_ids
+        Function for getting one page of sensor table rows with keyset pagination. Rows are ordered by order_column with nulls last and then by id, and the page starts after the (order value, id) key of the last row of the previous page. filters is a list of (column, operator, value) tuples.
         """
-        if not sitechan_ids:
-            return []
+        if order_column < 0 or order_column >= len(SENSOR_PAGE_COLUMNS):
+            raise Exception("ERROR: No sensor column {0}".format(order_column))
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        params = {'limit':limit}
+        conditions = ['sitechan.id = sensor.sitechan_id', 'station.id = sitechan.station_id']
+        conditions += self._pageFilterClause(SENSOR_PAGE_COLUMNS, filters, params)
+        conditions += self._pageKeysetClause(SENSOR_PAGE_COLUMNS, order_column, descending, after, params)
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor
-                    WHERE
-                        sitechan_id IN %s
-                    """)
-            cur.execute(query, (tuple(sitechan_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor
-                    WHERE
-                        sitechan_id IN %(sitechan_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
-
-            cur.execute(query, {'sitechan_ids':tuple(sitechan_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
-        return_ids = [a[0] for a in cur.fetchall()]
+        query = (   """
+                SELECT
+                    {0}
+                FROM
+                    sensor, sitechan, station
+                WHERE
+                    {1}
+                ORDER BY
+                    {2} {3} NULLS LAST, sensor.id
+                LIMIT
+                    %(limit)s
+                """).format(', '.join(SENSOR_PAGE_COLUMNS), ' AND '.join(conditions),
+                            SENSOR_PAGE_COLUMNS[order_column], 'DESC' if descending else 'ASC')
+
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, params)
+            return [list(row) for row in cur.fetchall()]
+
+    @instrumented
+    def getStationsSince(self, max_id, max_load_date):
+        """
+        Function for fetching only the stations with an id larger than max_id or a load_date on or after max_load_date. load_date is a date, so rows edited later on the day of the watermark are fetched again. The stations are merged by id into the loaded stations and the merged station objects are returned.
+        """
+        query = (   """
+                SELECT
+                    station.id, network.network, {0}
+                FROM
+                    station, network
+                WHERE
+                    station.network_id = network.id
+                AND
+                    (station.id > %(max_id)s OR station.load_date >= %(load_date)s)
+                """).format(', '.join('station.' + col for col in STATION_COLUMNS))
+
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, {'max_id':max_id, 'load_date':max_load_date})
+            rows = cur.fetchall()
+
+        stations_by_id = dict((stat.s_id, stat) for stat in self.stations)
+        changed = []
+        new_stations = []
+
+        for row in rows:
+            stat = stations_by_id.get(row[0])
+            if stat is None:
+                stat = Station()
+                stat.s_id = row[0]
+                stat.sitechans = []
+                new_stations.append(stat)
+            stat.network = row[1]
+            for col, value in zip(STATION_COLUMNS, row[2:]):
+                setattr(stat, col, value)
+            changed.append(stat)
+
+        self.inventory_store.addStations(new_stations)
+
+        if changed:
+            self.inventory_graph = InventoryGraph(self.stations)
+            self.invalidateSnapshots()
+            self._updateInventoryCache(stations = changed)
+
+        return changed
+
+    @instrumented
+    def getSitechansSince(self, max_id, max_load_date):
+        """
+        Function for fetching only the sitechans with an id larger than max_id or a load_date on or after max_load_date and patching them by id into the loaded station tree. Sitechans of stations that are not loaded are skipped. Returns the stations whose sitechans changed, including the old station of a moved sitechan.
+        """
+        query = (   """
+                SELECT
+                    sitechan.id, sitechan.station_id, station.station_code, {0}
+                FROM
+                    sitechan, station
+                WHERE
+                    station.id = sitechan.station_id
+                AND
+                    (sitechan.id > %(max_id)s OR sitechan.load_date >= %(load_date)s)
+                """).format(', '.join('sitechan.' + col for col in SITECHAN_COLUMNS))
+
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, {'max_id':max_id, 'load_date':max_load_date})
+            rows = cur.fetchall()
+
+        stations_by_id = dict((stat.s_id, stat) for stat in self.stations)
+        sitechan_stations = dict((chan.s_id, (chan, stat)) for stat in self.stations for chan in stat.sitechans)
+        changed = {}
+
+        for row in rows:
+            stat = stations_by_id.get(row[1])
+            if stat is None:
+                continue
+
+            chan, old_stat = sitechan_stations.get(row[0], (None, None))
+            if chan is None:
+                chan = SiteChan()
+                chan.s_id = row[0]
+                chan.sensors = []
+                stat.sitechans.append(chan)
+            elif old_stat is not stat:
+                old_stat.sitechans.remove(chan)
+                stat.sitechans.append(chan)
+                changed[old_stat.s_id] = old_stat
+
+            chan.station_code = row[2]
+            for col, value in zip(SITECHAN_COLUMNS, row[3:]):
+                setattr(chan, col, value)
+            for sen in chan.sensors:
+                sen.station_code = chan.station_code
+                sen.channel_code = chan.channel_code
+            changed[stat.s_id] = stat
 
-        db_conn.close()
+        if changed:
+            self._storeStationTree(list(changed.values()))
 
-        return return_ids
+        return list(changed.values())
 
-    def getSensorIdsFromInstruments(self, instrument_ids, selected_datetime):
+    @instrumented
+    def getSensorsSince(self, max_id, max_lddate):
         """
-        Function for getting a list of sensor_ids from instrument_ids
+        Function for fetching only the sensors with an id larger than max_id or a lddate on or after max_lddate and patching them by id into the loaded station tree. Sensors of sitechans that are not loaded are skipped. Returns the stations whose sensors changed, including the old station of a moved sensor.
         """
-        if not instrument_ids:
-            return []
+        query = (   """
+                SELECT
+                    sensor.id, sensor.sitechan_id, sensor.instrument_id, {0}
+                FROM
+                    sensor
+                WHERE
+                    sensor.id > %(max_id)s OR sensor.lddate >= %(lddate)s
+                """).format(', '.join('sensor.' + col for col in SENSOR_COLUMNS))
+
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, {'max_id':max_id, 'lddate':max_lddate})
+            rows = cur.fetchall()
+
+        sitechans = dict((chan.s_id, (chan, stat)) for stat in self.stations for chan in stat.sitechans)
+        sensor_sitechans = dict((sen.s_id, (sen, chan, stat)) for chan, stat in sitechans.values() for sen in chan.sensors)
+        changed = {}
+
+        for row in rows:
+            chan, stat = sitechans.get(row[1], (None, None))
+            if chan is None:
+                continue
+
+            sen, old_chan, old_stat = sensor_sitechans.get(row[0], (None, None, None))
+            if sen is None:
+                sen = Sensor()
+                sen.s_id = row[0]
+                chan.sensors.append(sen)
+            elif old_chan is not chan:
+                old_chan.sensors.remove(sen)
+                chan.sensors.append(sen)
+                changed[old_stat.s_id] = old_stat
+
+            sen.station_code = chan.station_code
+            sen.channel_code = chan.channel_code
+            sen.instrument_id = row[2]
+            ins = self.instruments_by_id.get(row[2])
+            sen.instruments = [] if ins is None else [ins]
+            for col, value in zip(SENSOR_COLUMNS, row[3:]):
+                setattr(sen, col, value)
+            changed[stat.s_id] = stat
+
+        if changed:
+            self._storeStationTree(list(changed.values()))
+
+        return list(changed.values())
+
+    @instrumented
+    def getInstrumentsSince(self, max_id, max_lddate):
+        """
+        Function for fetching only the instruments with an id larger than max_id or a lddate on or after max_lddate. The instruments are merged by id into the loaded instruments and the merged instrument objects are returned.
+        """
+        query = INSTRUMENT_QUERY + " WHERE instrument.id > %(max_id)s OR instrument.lddate >= %(lddate)s"
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, {'max_id':max_id, 'lddate':max_lddate})
+            rows = cur.fetchall()
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor
-                    WHERE
-                        instrument_id IN %s
-                    """)
-            cur.execute(query, (tuple(instrument_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.id)
-                    FROM
-                        sensor
-                    WHERE
-                        instrument_id IN %(instrument_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
-            cur.execute(query, {'instrument_ids':tuple(instrument_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
+        changed = []
+        new_instruments = []
 
-        return_ids = [a[0] for a in cur.fetchall()]
+        for row in rows:
+            ins = self.instruments_by_id.get(row[0])
+            if ins is None:
+                ins = self._instrumentFromRow(row)
+                new_instruments.append(ins)
+            else:
+                if ins.dfile != row[1 + INSTRUMENT_COLUMNS.index('dfile')] and self.instruments_by_dfile.get(ins.dfile) is ins:
+                    del self.instruments_by_dfile[ins.dfile]
+                self._instrumentFromRow(row, ins)
+            changed.append(ins)
 
-        db_conn.close()
+        self.inventory_store.addInstruments(new_instruments)
+        self._indexInstruments(changed)
+        self._updateInventoryCache(instruments = changed)
 
-        return return_ids
+        return changed
 
-    def getInstrumentIdsFromStations(self, station_ids, selected_datetime):
+    @instrumented
+    def getResponse(self, instrument_id):
         """
-        Function for getting a list of instrument_ids from station_ids
+        Function for getting the response of the instrument with instrument_id or None if there is no such instrument
         """
-        if not station_ids:
-            return []
+        ins = self.getInstrument(instrument_id)
+        if ins is None:
+            return None
+        return self.loadResponse(ins.response_id)
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+    @instrumented
+    def loadResponse(self, response_id):
+        """
+        Function for getting the full response with response_id. Responses are read from the database on first use and kept in a least recently used cache limited by response_cache_bytes.
+        """
+        if response_id is None or response_id == -1:
+            return None
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.instrument_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        station_id IN %s
-                    AND
-                        sitechan.id = sitechan_id
-                    """)
-            cur.execute(query, (tuple(station_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(sensor.instrument_id)
-                    FROM
-                        sitechan, sensor
-                    WHERE
-                        station_id IN %(station_ids)s
-                    AND
-                        sitechan.id = sensor.sitechan_id
-                    AND
-                        (
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date >= %(s_datetime)s)
-                        OR
-                            (sitechan.on_date <= %(s_datetime)s AND
-                            sitechan.off_date IS NULL)
-                        )
-                    """)
-            cur.execute(query, {'station_ids':tuple(station_ids), 's_datetime':selected_datetime})
+        response = self.responses_by_id.get(response_id)
+        if response is not None and not isStub(response):
+            return response
 
-        return_ids = [a[0] for a in cur.fetchall()]
+        response = self.response_cache.get(response_id)
+        if response is not None:
+            return response
 
-        db_conn.close()
+        response = self._fetchResponse(response_id)
+        if response is not None:
+            self.response_cache.put(response_id, response)
 
-        return return_ids
+        return response
 
-    def getInstrumentIdsFromSitechans(self, sitechan_ids, selected_datetime):
+    def _fetchResponse(self, response_id):
         """
-        Function for getting a list of instrument_ids from sitechan_ids
+        Function for reading a single response with its paz or fap data from the database
         """
-        if not sitechan_ids:
-            return []
-
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        with self.connection_pool.cursor() as cur:
+            cur.execute("SELECT id, {0} FROM response WHERE id = %s".format(', '.join(RESPONSE_COLUMNS)), (response_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+
+            response = DatabaseResponse(*row)
+
+            if response.response_format == 'paz':
+                cur.execute("SELECT id, scale_factor FROM paz_response WHERE response_id = %s", (response_id,))
+                paz = cur.fetchone()
+                if paz is not None:
+                    response.scale_factor = paz[1]
+                    cur.execute("SELECT real, imag, real_error, imag_error FROM pole WHERE paz_id = %s ORDER BY id", (paz[0],))
+                    response.poles = [list(pole) for pole in cur.fetchall()]
+                    cur.execute("SELECT real, imag, real_error, imag_error FROM zero WHERE paz_id = %s ORDER BY id", (paz[0],))
+                    response.zeros = [list(zero) for zero in cur.fetchall()]
+            elif response.response_format == 'fap':
+                cur.execute(    """
+                                SELECT
+                                    fap.frequency, fap.amplitude, fap.phase, fap.amplitude_error, fap.phase_error
+                                FROM
+                                    fap, fap_response
+                                WHERE
+                                    fap.fap_id = fap_response.id
+                                AND
+                                    fap_response.response_id = %s
+                                ORDER BY
+                                    fap.frequency
+                                """, (response_id,))
+                response.fap = [list(fap) for fap in cur.fetchall()]
+
+        return response
+
+    def getInstrument(self, instrument_id):
+        """
+        Function for getting the instrument with instrument_id or None if there is no such instrument
+        """
+        self._loadInstruments()
+        return self.instruments_by_id.get(instrument_id)
 
-        if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(instrument_id)
-                    FROM
-                        sensor
-                    WHERE
-                        sitechan_id IN %s
-                    """)
-            cur.execute(query, (tuple(sitechan_ids), ))
-        else:
-            query = (   """
-                    SELECT
-                        DISTINCT(instrument_id)
-                    FROM
-                        sensor
-                    WHERE
-                        sitechan_id IN %(sitechan_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
-            cur.execute(query, {'sitechan_ids':tuple(sitechan_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
+    def getResponseById(self, response_id):
+        """
+        Function for getting the response with response_id or None if there is no such response
+        """
+        return self.loadResponse(response_id)
 
-        return_ids = [a[0] for a in cur.fetchall()]
+    def getResponseByDfile(self, dfile):
+        """
+        Function for getting the response of the instruments using dfile or None if no instrument uses it
+        """
+        self._loadInstruments()
+        ins = self.instruments_by_dfile.get(dfile)
+        if ins is None:
+            return None
+        return self.loadResponse(ins.response_id)
 
-        db_conn.close()
+    def getDfiles(self):
+        """
+        Function for getting the dfiles of all instruments
+        """
+        self._loadInstruments()
+        return list(self.instruments_by_dfile.keys())
 
-        return return_ids
+    def getStationCodes(self):
+        """
+        Function for getting the sorted station codes of all stations
+        """
+        self.loadInventory()
+        return sorted(set(stat.station_code for stat in self.stations))
 
-    def getInstrumentIdsFromSensors(self, sensor_ids, selected_datetime):
+    @instrumented
+    def resolveSelectionClosure(self, kind, ids, selected_datetime):
         """
-        Function for getting a list of instrument_ids from sensor_ids
+        Function for resolving every station, sitechan, sensor and instrument id related to ids of type kind with a single query. kind is one of 'station', 'sitechan', 'sensor' or 'instrument'. Returns a tuple of four id lists in that order. The ids of the given kind are returned as they are.
         """
-        if not sensor_ids:
-            return []
+        if kind not in self.CLOSURE_SEED_COLUMNS:
+            raise Exception("ERROR: Unknown selection kind {0}".format(kind))
+
+        if not ids:
+            return [], [], [], []
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if self.inventory_graph is not None and self.inventory_graph.covers(kind, ids):
+            return self.inventory_graph.resolveSelectionClosure(kind, ids, selected_datetime)
 
         if selected_datetime is None:
-            query = (   """
-                    SELECT
-                        DISTINCT(instrument_id)
-                    FROM
-                        sensor
-                    WHERE
-                        id IN %s
-                    """)
-            cur.execute(query, (tuple(sensor_ids), ))
+            sensor_filter = ""
+            sitechan_filter = ""
+            params = {'ids':tuple(ids)}
         else:
-            query = (   """
+            sensor_filter = """
+                        AND
+                            (
+                                (sensor.time <= %(s_time)s AND
+                                sensor.endtime >= %(s_time)s)
+                            OR
+                                (sensor.time <= %(s_time)s AND
+                                sensor.endtime = 9999999999.999)
+                            )"""
+            sitechan_filter = """
+                        AND
+                            (
+                                (sitechan.on_date <= %(s_datetime)s AND
+                                sitechan.off_date >= %(s_datetime)s)
+                            OR
+                                (sitechan.on_date <= %(s_datetime)s AND
+                                sitechan.off_date IS NULL)
+                            )"""
+            params = {'ids':tuple(ids), 's_datetime':selected_datetime, 's_time':time.mktime(selected_datetime.timetuple())}
+
+        query = (   """
+                WITH links AS (
                     SELECT
-                        DISTINCT(instrument_id)
+                        sitechan.station_id, sitechan.id AS sitechan_id, sensor.id AS sensor_id, sensor.instrument_id
                     FROM
+                        sitechan
+                    LEFT JOIN
                         sensor
+                    ON
+                        sensor.sitechan_id = sitechan.id{0}
                     WHERE
-                        id IN %(sensor_ids)s
-                    AND
-                        (
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime >= %(s_datetime)s)
-                        OR
-                            (sensor.time <= %(s_datetime)s AND
-                            sensor.endtime = 9999999999.999)
-                       )
-                    """)
-            cur.execute(query, {'sensor_ids':tuple(sensor_ids), 's_datetime':time.mktime(selected_datetime.timetuple())})
+                        {1} IN %(ids)s{2}
+                )
+                SELECT
+                    ARRAY(SELECT DISTINCT station_id FROM links),
+                    ARRAY(SELECT DISTINCT sitechan_id FROM links),
+                    ARRAY(SELECT DISTINCT sensor_id FROM links WHERE sensor_id IS NOT NULL),
+                    ARRAY(SELECT DISTINCT instrument_id FROM links WHERE instrument_id IS NOT NULL)
+                """).format(sensor_filter, self.CLOSURE_SEED_COLUMNS[kind], sitechan_filter)
 
-        return_ids = [a[0] for a in cur.fetchall()]
+        with self.connection_pool.cursor() as cur:
+            cur.execute(query, params)
+            closure = list(cur.fetchone())
 
-        db_conn.close()
+        closure[self.CLOSURE_KINDS.index(kind)] = list(ids)
 
-        return return_ids
+        return tuple(closure)
 
+    @instrumented
+    def getActiveInventory(self, selected_datetime):
+        """
+        Function for getting an InventorySnapshot of all station, sitechan, sensor and instrument ids active at selected_datetime. Snapshots are kept in a LRU cache keyed by the date.
+        """
+        snapshot = self.snapshot_cache.get(selected_datetime)
+
+        if snapshot is None:
+            if self.inventory_graph is not None and selected_datetime is not None:
+                snapshot = InventorySnapshot(*[tuple(ids) for ids in self.inventory_graph.getActiveInventory(selected_datetime)])
+            else:
+                snapshot = InventorySnapshot(   tuple(self.getStationIds(selected_datetime)),
+                                                tuple(self.getSitechanIds(selected_datetime)),
+                                                tuple(self.getSensorIds(selected_datetime)),
+                                                tuple(self.getInstrumentIds(selected_datetime)))
+            self.snapshot_cache.put(selected_datetime, snapshot)
+
+        return snapshot
+
+    @instrumented
+    def getInventoryDateRange(self):
+        """
+        Function for getting the dates of the first and last epoch boundary in the inventory or None if the inventory has not been loaded
+        """
+        if self.inventory_graph is None:
+            return None
+        return self.inventory_graph.getDateRange()
+
+    @instrumented
     def getStationIds(self, selected_datetime):
         """
         Function for getting a list of station ids with selected_datetime
@@ -686,8 +1064,8 @@ class DatabaseApi(object):
         if selected_datetime is None:
             return [s.s_id for s in self.stations]
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if self.inventory_graph is not None:
+            return list(self.getActiveInventory(selected_datetime).stations)
 
         query = (   """
                 SELECT
@@ -704,14 +1082,11 @@ class DatabaseApi(object):
                         )
                 """)
 
-        cur.execute(query, {'s_datetime':selected_datetime})
-
-        return_ids = [a[0] for a in cur.fetchall()]
-
-        db_conn.close()
+        return_ids = self._fetchIds(query, {'s_datetime':selected_datetime})
 
         return return_ids
 
+    @instrumented
     def getSitechanIds(self, selected_datetime):
         """
         Function for getting a list of sitechan ids with selected_datetime
@@ -719,8 +1094,8 @@ class DatabaseApi(object):
         if selected_datetime is None:
             return [s.s_id for s in self.sitechans]
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if self.inventory_graph is not None:
+            return list(self.getActiveInventory(selected_datetime).sitechans)
 
         query = (   """
                 SELECT
@@ -737,14 +1112,11 @@ class DatabaseApi(object):
                         )
                 """)
 
-        cur.execute(query, {'s_datetime':selected_datetime})
-
-        return_ids = [a[0] for a in cur.fetchall()]
-
-        db_conn.close()
+        return_ids = self._fetchIds(query, {'s_datetime':selected_datetime})
 
         return return_ids
 
+    @instrumented
     def getSensorIds(self, selected_datetime):
         """
         Function for getting a list of sensor ids with selected_datetime
@@ -752,8 +1124,8 @@ class DatabaseApi(object):
         if selected_datetime is None:
             return [s.s_id for s in self.sensors]
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if self.inventory_graph is not None:
+            return list(self.getActiveInventory(selected_datetime).sensors)
 
         query = (   """
                 SELECT
@@ -770,14 +1142,11 @@ class DatabaseApi(object):
                        )
                 """)
 
-        cur.execute(query, {'s_datetime':time.mktime(selected_datetime.timetuple())})
-
-        return_ids = [a[0] for a in cur.fetchall()]
-
-        db_conn.close()
+        return_ids = self._fetchIds(query, {'s_datetime':time.mktime(selected_datetime.timetuple())})
 
         return return_ids
 
+    @instrumented
     def getInstrumentIds(self, selected_datetime):
         """
         Function for getting a list of sensor ids with selected_datetime
@@ -785,8 +1154,8 @@ class DatabaseApi(object):
         if selected_datetime is None:
             return [s.instruments[0].i_id for s in self.sensors]
 
-        db_conn = log2nordb()
-        cur = db_conn.cursor()
+        if self.inventory_graph is not None:
+            return list(self.getActiveInventory(selected_datetime).instruments)
 
         query = (   """
                 SELECT
@@ -803,11 +1172,7 @@ class DatabaseApi(object):
                        )
                 """)
 
-        cur.execute(query, {'s_datetime':time.mktime(selected_datetime.timetuple())})
-
-        return_ids = [a[0] for a in cur.fetchall()]
-
-        db_conn.close()
+        return_ids = self._fetchIds(query, {'s_datetime':time.mktime(selected_datetime.timetuple())})
 
         return return_ids
 
@@ -0,0 +1,177 @@
+"""
+This module contains a worker for running DatabaseApi calls outside of the Qt GUI thread of the StationTool Program
+"""
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class DatabaseTaskSignals(QObject):
+    """
+    Signals of a single DatabaseTask. The object is created in the GUI thread, so the results are delivered there.
+    """
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, object)
+    chunk = pyqtSignal(str, int, object)
+
+class DatabaseTask(QRunnable):
+    """
+    Runnable that executes one database call in the thread pool of a DatabaseWorker
+    """
+    def __init__(self, worker, key, generation, function, args, stream = False):
+        QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self.worker = worker
+        self.key = key
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.stream = stream
+        self.signals = DatabaseTaskSignals()
+
+    def run(self):
+        """
+        Overridden run function. Tasks that have been superseded before they start are skipped, but still reported so the worker can release them.
+        """
+        if not self.worker.isCurrent(self.key, self.generation):
+            self.signals.finished.emit(self.key, self.generation, None)
+            return
+
+        try:
+            if self.stream:
+                result = self.runStream()
+            else:
+                result = self.function(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.key, self.generation, e)
+            return
+
+        self.signals.finished.emit(self.key, self.generation, result)
+
+    def runStream(self):
+        """
+        Function for running a generator function and emitting every chunk it yields. The generator is closed as soon as the task is superseded.
+        """
+        chunks = self.function(*self.args)
+        try:
+            for chunk in chunks:
+                if not self.worker.isCurrent(self.key, self.generation):
+                    break
+                self.signals.chunk.emit(self.key, self.generation, chunk)
+        finally:
+            chunks.close()
+
+        return None
+
+class DatabaseWorker(QObject):
+    """
+    Class for running database calls in a background thread pool and delivering the results back to the GUI thread. Every call is submitted with a key and a newer call with the same key supersedes the older one: the older call is skipped if it has not started yet and its result is dropped if it has. Interactive calls, such as resolving a clicked selection, run in a thread pool of their own, so they do not wait behind inventory loads and tab prefetches.
+    """
+    def __init__(self, parent = None, thread_count = 1, interactive_thread_count = 1):
+        QObject.__init__(self, parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(thread_count)
+        self.interactive_pool = QThreadPool(self)
+        self.interactive_pool.setMaxThreadCount(interactive_thread_count)
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._callbacks = {}
+        self._tasks = {}
+
+    def isCurrent(self, key, generation):
+        """
+        Function for checking if generation is still the newest request for key
+        """
+        with self._lock:
+            return self._generations.get(key) == generation
+
+    def submit(self, key, function, args = (), callback = None, error_callback = None, interactive = False):
+        """
+        Function for running function(*args) in the background. callback is called with the result in the GUI thread unless a newer request with the same key has been submitted or the key has been cancelled. Short calls the user is waiting for should be submitted as interactive.
+        """
+        return self._start(key, function, args, callback, error_callback, None, False, interactive)
+
+    def submitStream(self, key, function, args = (), chunk_callback = None, callback = None, error_callback = None):
+        """
+        Function for running a generator function(*args) in the background. chunk_callback is called in the GUI thread with every chunk the generator yields and callback is called with None once the generator is exhausted. Superseding the key stops the generator.
+        """
+        return self._start(key, function, args, callback, error_callback, chunk_callback, True, False)
+
+    def _start(self, key, function, args, callback, error_callback, chunk_callback, stream, interactive):
+        """
+        Function for registering the callbacks of a new request and starting it in the thread pool
+        """
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+
+        self._callbacks[key] = (generation, callback, error_callback, chunk_callback)
+
+        task = DatabaseTask(self, key, generation, function, args, stream)
+        task.signals.finished.connect(self._handleFinished)
+        task.signals.failed.connect(self._handleFailed)
+        task.signals.chunk.connect(self._handleChunk)
+        self._tasks[(key, generation)] = task
+        if interactive:
+            self.interactive_pool.start(task)
+        else:
+            self.thread_pool.start(task)
+
+        return generation
+
+    def cancel(self, key):
+        """
+        Function for cancelling all pending and running requests of key
+        """
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self._callbacks.pop(key, None)
+
+    def _takeCallbacks(self, key, generation):
+        """
+        Function for getting the callbacks of a finished request or None if the request has been superseded
+        """
+        self._tasks.pop((key, generation), None)
+        entry = self._callbacks.get(key)
+
+        if entry is None or entry[0] != generation:
+            return None
+
+        del self._callbacks[key]
+        return entry
+
+    def _handleChunk(self, key, generation, chunk):
+        """
+        Function for delivering one chunk of a streaming request
+        """
+        entry = self._callbacks.get(key)
+        if entry is not None and entry[0] == generation and entry[3] is not None:
+            entry[3](chunk)
+
+    def _handleFinished(self, key, generation, result):
+        """
+        Function for delivering the result of a finished request
+        """
+        entry = self._takeCallbacks(key, generation)
+        if entry is not None and entry[1] is not None:
+            entry[1](result)
+
+    def _handleFailed(self, key, generation, error):
+        """
+        Function for delivering the error of a failed request
+        """
+        entry = self._takeCallbacks(key, generation)
+        if entry is None:
+            return
+        if entry[2] is not None:
+            entry[2](error)
+        else:
+            print("Database request {0} failed: {1}".format(key, error))
+
+    def shutdown(self):
+        """
+        Function for cancelling all requests and waiting for the running ones to finish
+        """
+        for key in list(self._generations):
+            self.cancel(key)
+        self.thread_pool.waitForDone()
+        self.interactive_pool.waitForDone()
@@ -0,0 +1,163 @@
+"""
+This module contains a local SQLite cache file of the station inventory used for warm starting the StationTool Program
+"""
+import io
+import os
+import copy
+import pickle
+import sqlite3
+
+from nordb.nordic.instrument import Instrument
+
+from other.lazyResponse import ResponseStub, isStub
+
+DEFAULT_INVENTORY_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.stationtool', 'inventory_cache.sqlite')
+
+class StationPickler(pickle.Pickler):
+    """
+    Pickler that writes the instruments attached to the sensors of a station as references to the instrument rows of the cache file, so the instruments and their responses are not stored again inside the station tree
+    """
+    def persistent_id(self, obj):
+        if isinstance(obj, Instrument) and getattr(obj, 'i_id', None) is not None:
+            return ('instrument', obj.i_id)
+        return None
+
+class StationUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves the instrument references written by StationPickler to the instruments read from the cache file. A reference to an instrument that is not in the file is resolved to an empty instrument with only the id set.
+    """
+    def __init__(self, data, instruments_by_id):
+        pickle.Unpickler.__init__(self, io.BytesIO(data))
+        self.instruments_by_id = instruments_by_id
+
+    def persistent_load(self, pid):
+        kind, i_id = pid
+        if kind != 'instrument':
+            raise pickle.UnpicklingError("Unknown persistent id {0}".format(pid))
+        ins = self.instruments_by_id.get(i_id)
+        if ins is None:
+            ins = Instrument()
+            ins.i_id = i_id
+            self.instruments_by_id[i_id] = ins
+        return ins
+
+class InventoryCacheFile(object):
+    """
+    Class for storing the station tree and the instruments to a SQLite file. Every station and instrument is stored as its own pickled row, so changed rows can be replaced without rewriting the whole file. The instruments of the sensors are stored only as references to the instrument rows, whose responses are stubs. The signature of the database the rows were read from is stored with them.
+    """
+    FORMAT_VERSION = 2
+
+    def __init__(self, path = DEFAULT_INVENTORY_CACHE_PATH):
+        self.path = path
+
+    def exists(self):
+        """
+        Function for checking if the cache file has been written
+        """
+        return os.path.isfile(self.path)
+
+    def _connect(self):
+        """
+        Function for opening the cache file and creating its tables
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)")
+        conn.execute("CREATE TABLE IF NOT EXISTS station (id INTEGER PRIMARY KEY, data BLOB)")
+        conn.execute("CREATE TABLE IF NOT EXISTS instrument (id INTEGER PRIMARY KEY, data BLOB)")
+        return conn
+
+    def load(self):
+        """
+        Function for reading the cache file. Returns a tuple of the signature, stations and instruments or None if the file does not exist or can not be read.
+        """
+        if not self.exists():
+            return None
+
+        try:
+            conn = self._connect()
+            try:
+                meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+                if meta.get('version') is None or pickle.loads(meta['version']) != self.FORMAT_VERSION or 'signature' not in meta:
+                    return None
+                signature = pickle.loads(meta['signature'])
+                instruments = [pickle.loads(row[0]) for row in conn.execute("SELECT data FROM instrument ORDER BY id")]
+                instruments_by_id = dict((ins.i_id, ins) for ins in instruments)
+                stations = [StationUnpickler(bytes(row[0]), instruments_by_id).load() for row in conn.execute("SELECT data FROM station ORDER BY id")]
+            finally:
+                conn.close()
+        except Exception as e:
+            print("Could not read inventory cache {0}: {1}".format(self.path, e))
+            return None
+
+        return signature, stations, instruments
+
+    def save(self, signature, stations, instruments):
+        """
+        Function for replacing the whole content of the cache file
+        """
+        self._write(signature, stations, instruments, True)
+
+    def update(self, signature, stations = (), instruments = ()):
+        """
+        Function for replacing only the given stations and instruments in the cache file
+        """
+        self._write(signature, stations, instruments, False)
+
+    def _write(self, signature, stations, instruments, replace_all):
+        """
+        Function for writing rows and the signature to the cache file in a single transaction
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    if replace_all:
+                        conn.execute("DELETE FROM station")
+                        conn.execute("DELETE FROM instrument")
+                    conn.executemany("INSERT OR REPLACE INTO station (id, data) VALUES (?, ?)",
+                                     [(stat.s_id, self._dumpsStation(stat)) for stat in stations])
+                    conn.executemany("INSERT OR REPLACE INTO instrument (id, data) VALUES (?, ?)",
+                                     [(ins.i_id, self._dumps(self._strippedInstrument(ins))) for ins in instruments])
+                    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                     [('version', self._dumps(self.FORMAT_VERSION)), ('signature', self._dumps(signature))])
+            finally:
+                conn.close()
+        except Exception as e:
+            print("Could not write inventory cache {0}: {1}".format(self.path, e))
+
+    def _dumps(self, value):
+        """
+        Function for pickling a value into a SQLite blob
+        """
+        return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def _dumpsStation(self, station):
+        """
+        Function for pickling a station into a SQLite blob with its sensor instruments written as references
+        """
+        data = io.BytesIO()
+        StationPickler(data, pickle.HIGHEST_PROTOCOL).dump(station)
+        return sqlite3.Binary(data.getvalue())
+
+    def _strippedInstrument(self, ins):
+        """
+        Function for replacing a loaded response of an instrument with a stub so that response data is not written to the cache
+        """
+        response = getattr(ins, 'response', None)
+        if response is None or isStub(response):
+            return ins
+
+        stripped = copy.copy(ins)
+        stripped.response = ResponseStub(response.response_id, response.file_name, response.response_format)
+        return stripped
+
+    def remove(self):
+        """
+        Function for deleting the cache file
+        """
+        if self.exists():
+            os.remove(self.path)
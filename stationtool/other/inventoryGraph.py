@@ -0,0 +1,314 @@
+"""
+This module contains an in-memory graph of the station inventory for resolving relations and active epochs without the database
+"""
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, date
+
+def toDate(value):
+    """
+    Function for normalising a date or datetime value into a date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def toEpoch(value):
+    """
+    Function for transforming a date or datetime into epoch seconds the same way the sensor queries do
+    """
+    return time.mktime(value.timetuple())
+
+OPEN_SENSOR_ENDTIME = 9999999999.999
+
+def sensorInstrumentId(sensor):
+    """
+    Function for getting the instrument id of a nordb sensor object or None if it has no instrument
+    """
+    if getattr(sensor, 'instruments', None):
+        return sensor.instruments[0].i_id
+    return getattr(sensor, 'instrument_id', None)
+
+class EpochIndex(object):
+    """
+    Lookup table of the epochs of one entity type for checking if a single id is active at a given time. Whole active sets are read from the ChangePointIndex.
+    """
+    def __init__(self):
+        self._epochs = {}
+
+    def build(self, epochs):
+        """
+        Function for building the index from a list of (id, start, end) tuples. A start or end of None is treated as open.
+        """
+        self._epochs = dict((e_id, (start, end)) for e_id, start, end in epochs)
+
+    def isActive(self, e_id, value):
+        """
+        Function for checking if the epoch of e_id contains value. Unknown ids are never active.
+        """
+        if e_id not in self._epochs:
+            return False
+        start, end = self._epochs[e_id]
+        return (start is None or start <= value) and (end is None or end >= value)
+
+    def getEpochs(self):
+        """
+        Function for getting all indexed epochs as (id, start, end) tuples
+        """
+        return [(e_id, epoch[0], epoch[1]) for e_id, epoch in self._epochs.items()]
+
+    def __contains__(self, e_id):
+        return e_id in self._epochs
+
+    def __len__(self):
+        return len(self._epochs)
+
+class ChangePointIndex(object):
+    """
+    Index of every epoch boundary of stations, sitechans and sensors. Each boundary stores the ids that become active on it and the ids that stop being active after it. The full active sets are stored as checkpoints on every checkpoint_interval boundary, so the active inventory at any time is rebuilt from the nearest checkpoint and a few deltas.
+    """
+    KINDS = ('station', 'sitechan', 'sensor')
+
+    def __init__(self, checkpoint_interval = 64):
+        self.checkpoint_interval = checkpoint_interval
+        self.times = []
+        self.added = []
+        self.removed = []
+        self._base = {}
+        self._checkpoints = {}
+
+    def build(self, epochs):
+        """
+        Function for building the index. epochs is a dictionary with a list of (id, start, end) tuples in epoch seconds for every kind. A start or end of None is treated as open.
+        """
+        events = {}
+        self._base = dict((kind, set()) for kind in self.KINDS)
+
+        for kind in self.KINDS:
+            for e_id, start, end in epochs[kind]:
+                if start is not None and end is not None and end < start:
+                    continue
+                if start is None:
+                    self._base[kind].add(e_id)
+                else:
+                    events.setdefault(start, ([], []))[0].append((kind, e_id))
+                if end is not None:
+                    events.setdefault(end, ([], []))[1].append((kind, e_id))
+
+        self.times = sorted(events)
+        self.added = [events[t][0] for t in self.times]
+        self.removed = [events[t][1] for t in self.times]
+
+        self._checkpoints = {}
+        state = self._copyState(self._base)
+        for i in range(len(self.times)):
+            self._applyAdded(state, i)
+            self._applyRemoved(state, i)
+            if i % self.checkpoint_interval == 0:
+                self._checkpoints[i] = self._copyState(state)
+
+    def _copyState(self, state):
+        """
+        Function for copying the active sets of a state
+        """
+        return dict((kind, set(state[kind])) for kind in self.KINDS)
+
+    def _applyAdded(self, state, i):
+        """
+        Function for adding the ids that become active on boundary i to state
+        """
+        for kind, e_id in self.added[i]:
+            state[kind].add(e_id)
+
+    def _applyRemoved(self, state, i):
+        """
+        Function for removing the ids that stop being active after boundary i from state
+        """
+        for kind, e_id in self.removed[i]:
+            state[kind].discard(e_id)
+
+    def _stateAfter(self, i):
+        """
+        Function for rebuilding the active sets right after boundary i from the nearest checkpoint
+        """
+        if i < 0:
+            return self._copyState(self._base)
+
+        c = i - i % self.checkpoint_interval
+        state = self._copyState(self._checkpoints[c])
+        for j in range(c + 1, i + 1):
+            self._applyAdded(state, j)
+            self._applyRemoved(state, j)
+
+        return state
+
+    def activeAt(self, value):
+        """
+        Function for getting a dictionary of active id sets of every kind at value. Epochs are inclusive at both ends.
+        """
+        i = bisect_right(self.times, value) - 1
+
+        if i >= 0 and self.times[i] == value:
+            state = self._stateAfter(i - 1)
+            self._applyAdded(state, i)
+        else:
+            state = self._stateAfter(i)
+
+        return state
+
+    def getTimeRange(self):
+        """
+        Function for getting the first and last boundary of the index or None if the index is empty
+        """
+        if not self.times:
+            return None
+        return self.times[0], self.times[-1]
+
+class InventoryGraph(object):
+    """
+    Graph over the station -> sitechan -> sensor -> instrument tree with adjacency maps to both directions and epoch indexes for every level.
+    """
+    def __init__(self, stations):
+        self.station_sitechans = {}
+        self.sitechan_station = {}
+        self.sitechan_sensors = {}
+        self.sensor_sitechan = {}
+        self.sensor_instrument = {}
+        self.instrument_sensors = {}
+
+        self.station_epochs = EpochIndex()
+        self.sitechan_epochs = EpochIndex()
+        self.sensor_epochs = EpochIndex()
+        self.change_points = ChangePointIndex()
+
+        self.build(stations)
+
+    def build(self, stations):
+        """
+        Function for building all adjacency maps and epoch indexes from a list of nordb stations
+        """
+        station_epochs = []
+        sitechan_epochs = []
+        sensor_epochs = []
+
+        for stat in stations:
+            self.station_sitechans[stat.s_id] = []
+            station_epochs.append((stat.s_id, toDate(stat.on_date), toDate(stat.off_date)))
+
+            for chan in stat.sitechans:
+                self.station_sitechans[stat.s_id].append(chan.s_id)
+                self.sitechan_station[chan.s_id] = stat.s_id
+                self.sitechan_sensors[chan.s_id] = []
+                sitechan_epochs.append((chan.s_id, toDate(chan.on_date), toDate(chan.off_date)))
+
+                for sen in chan.sensors:
+                    self.sitechan_sensors[chan.s_id].append(sen.s_id)
+                    self.sensor_sitechan[sen.s_id] = chan.s_id
+                    sensor_epochs.append((sen.s_id, sen.time, sen.endtime))
+
+                    ins_id = sensorInstrumentId(sen)
+                    self.sensor_instrument[sen.s_id] = ins_id
+                    if ins_id is not None:
+                        self.instrument_sensors.setdefault(ins_id, []).append(sen.s_id)
+
+        self.station_epochs.build(station_epochs)
+        self.sitechan_epochs.build(sitechan_epochs)
+        self.sensor_epochs.build(sensor_epochs)
+
+        self.change_points.build({
+            'station':[(e_id, self._dateToEpoch(start), self._dateToEpoch(end)) for e_id, start, end in station_epochs],
+            'sitechan':[(e_id, self._dateToEpoch(start), self._dateToEpoch(end)) for e_id, start, end in sitechan_epochs],
+            'sensor':[(e_id, start, None if end == OPEN_SENSOR_ENDTIME else end) for e_id, start, end in sensor_epochs]
+        })
+
+    def _dateToEpoch(self, value):
+        """
+        Function for transforming a date into epoch seconds while keeping open ends as None
+        """
+        if value is None:
+            return None
+        return toEpoch(value)
+
+    def covers(self, kind, ids):
+        """
+        Function for checking if all ids of kind are known to the graph. Instruments are always covered, because an instrument without sensors has no relations.
+        """
+        if kind == 'station':
+            return all(i in self.station_sitechans for i in ids)
+        elif kind == 'sitechan':
+            return all(i in self.sitechan_station for i in ids)
+        elif kind == 'sensor':
+            return all(i in self.sensor_sitechan for i in ids)
+        return True
+
+    def getActiveInventory(self, selected_datetime):
+        """
+        Function for getting the active station, sitechan, sensor and instrument ids at selected_datetime from the change point index
+        """
+        state = self.change_points.activeAt(toEpoch(selected_datetime))
+        instruments = set(self.sensor_instrument[s] for s in state['sensor'] if self.sensor_instrument.get(s) is not None)
+
+        return list(state['station']), list(state['sitechan']), list(state['sensor']), list(instruments)
+
+    def getDateRange(self):
+        """
+        Function for getting the dates of the first and last epoch boundary or None if there are none
+        """
+        time_range = self.change_points.getTimeRange()
+        if time_range is None:
+            return None
+        return date.fromtimestamp(time_range[0]), date.fromtimestamp(time_range[1])
+
+    def resolveSelectionClosure(self, kind, ids, selected_datetime):
+        """
+        Local counterpart of DatabaseApi.resolveSelectionClosure. Walks the adjacency maps and returns the station, sitechan, sensor and instrument ids related to ids of type kind.
+        """
+        if selected_datetime is None:
+            chan_date = None
+            sen_time = None
+        else:
+            chan_date = toDate(selected_datetime)
+            sen_time = toEpoch(selected_datetime)
+
+        def chanActive(chan_id):
+            return chan_date is None or self.sitechan_epochs.isActive(chan_id, chan_date)
+
+        def senActive(sen_id):
+            return sen_time is None or self.sensor_epochs.isActive(sen_id, sen_time)
+
+        chan_ids = []
+        sen_ids = []
+
+        if kind == 'station':
+            for stat_id in ids:
+                for chan_id in self.station_sitechans.get(stat_id, []):
+                    if chanActive(chan_id):
+                        chan_ids.append(chan_id)
+                        sen_ids.extend(s for s in self.sitechan_sensors[chan_id] if senActive(s))
+        elif kind == 'sitechan':
+            for chan_id in ids:
+                if chan_id in self.sitechan_sensors and chanActive(chan_id):
+                    chan_ids.append(chan_id)
+                    sen_ids.extend(s for s in self.sitechan_sensors[chan_id] if senActive(s))
+        else:
+            if kind == 'sensor':
+                candidates = ids
+            else:
+                candidates = [s for i in ids for s in self.instrument_sensors.get(i, [])]
+
+            for sen_id in candidates:
+                chan_id = self.sensor_sitechan.get(sen_id)
+                if chan_id is not None and senActive(sen_id) and chanActive(chan_id):
+                    chan_ids.append(chan_id)
+                    sen_ids.append(sen_id)
+
+        closure = [
+            list(set(self.sitechan_station[c] for c in chan_ids)),
+            list(set(chan_ids)),
+            list(set(sen_ids)),
+            list(set(self.sensor_instrument[s] for s in sen_ids if self.sensor_instrument[s] is not None))
+        ]
+        closure[('station', 'sitechan', 'sensor', 'instrument').index(kind)] = list(ids)
+
+        return tuple(closure)
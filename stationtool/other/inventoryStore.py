@@ -0,0 +1,93 @@
+"""
+This module contains the shared store of the station inventory of the StationTool Program
+"""
+import threading
+
+class InventoryStore(object):
+    """
+    Single owner of the nordb station, sitechan, sensor and instrument objects. The station tree is flattened once when it changes and every table model and the map get the same read-only tuples, so each entity is held in memory only once. The instruments attached to the sensors of the station tree are replaced with the instruments of the store.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.stations = ()
+        self.sitechans = ()
+        self.sensors = ()
+        self.instruments = ()
+
+    def setStations(self, stations):
+        """
+        Function for replacing the station tree and flattening its sitechans and sensors
+        """
+        stations = tuple(stations)
+        sitechans = tuple(chan for stat in stations for chan in stat.sitechans)
+        sensors = tuple(sen for chan in sitechans for sen in chan.sensors)
+        self._linkSensorInstruments(sensors, self.instruments)
+
+        with self._lock:
+            self.stations = stations
+            self.sitechans = sitechans
+            self.sensors = sensors
+            self.version += 1
+
+    def addStations(self, stations):
+        """
+        Function for adding new stations to the station tree
+        """
+        if stations:
+            self.setStations(self.stations + tuple(stations))
+
+    def setInstruments(self, instruments):
+        """
+        Function for replacing all instruments
+        """
+        instruments = tuple(instruments)
+        self._linkSensorInstruments(self.sensors, instruments)
+
+        with self._lock:
+            self.instruments = instruments
+            self.version += 1
+
+    def _linkSensorInstruments(self, sensors, instruments):
+        """
+        Function for replacing the copies of instruments attached to sensors with the instrument objects of the store that have the same id
+        """
+        instruments_by_id = dict((ins.i_id, ins) for ins in instruments)
+        if not instruments_by_id:
+            return
+
+        for sen in sensors:
+            linked = getattr(sen, 'instruments', None)
+            if linked:
+                sen.instruments = [instruments_by_id.get(ins.i_id, ins) for ins in linked]
+
+    def addInstruments(self, instruments):
+        """
+        Function for adding new instruments
+        """
+        if instruments:
+            self.setInstruments(self.instruments + tuple(instruments))
+
+    def getStations(self):
+        """
+        Function for getting a read-only view of all stations
+        """
+        return self.stations
+
+    def getSitechans(self):
+        """
+        Function for getting a read-only view of the sitechans of all stations
+        """
+        return self.sitechans
+
+    def getSensors(self):
+        """
+        Function for getting a read-only view of the sensors of all sitechans
+        """
+        return self.sensors
+
+    def getInstruments(self):
+        """
+        Function for getting a read-only view of all instruments
+        """
+        return self.instruments
@@ -0,0 +1,74 @@
+"""
+This module contains the lightweight response objects used for loading instrument responses on demand in the StationTool Program
+"""
+import sys
+
+class ResponseStub(object):
+    """
+    Placeholder for a response that has not been loaded from the database. Only the identifying information is kept.
+    """
+    is_stub = True
+
+    def __init__(self, response_id, file_name, response_format):
+        self.response_id = response_id
+        self.file_name = file_name
+        self.response_format = response_format
+
+    def __str__(self):
+        return "{0} ({1}), not loaded".format(self.file_name, self.response_format)
+
+class DatabaseResponse(object):
+    """
+    Full response read from the database with its paz or fap data. Has the same attributes as the nordb responses used by the ResponseTab and the push functions.
+    """
+    is_stub = False
+
+    def __init__(self, response_id, file_name, source, stage, description, response_format, author):
+        self.response_id = response_id
+        self.file_name = file_name
+        self.source = source
+        self.stage = stage
+        self.description = description
+        self.response_format = response_format
+        self.author = author
+        self.scale_factor = None
+        self.poles = []
+        self.zeros = []
+        self.fap = []
+
+    def __str__(self):
+        lines = [   "File name:   {0}".format(self.file_name),
+                    "Format:      {0}".format(self.response_format),
+                    "Source:      {0}".format(self.source),
+                    "Stage:       {0}".format(self.stage),
+                    "Description: {0}".format(self.description),
+                    "Author:      {0}".format(self.author)]
+
+        if self.response_format == 'paz':
+            lines.append("Scale factor: {0}".format(self.scale_factor))
+            lines.append("Poles ({0}):".format(len(self.poles)))
+            lines.extend("  " + "  ".join(str(v) for v in pole) for pole in self.poles)
+            lines.append("Zeros ({0}):".format(len(self.zeros)))
+            lines.extend("  " + "  ".join(str(v) for v in zero) for zero in self.zeros)
+        elif self.response_format == 'fap':
+            lines.append("Frequency  Amplitude  Phase  Amplitude error  Phase error")
+            lines.extend("  ".join(str(v) for v in fap) for fap in self.fap)
+
+        return "\n".join(lines)
+
+def isStub(response):
+    """
+    Function for checking if response still has to be loaded from the database
+    """
+    return getattr(response, 'is_stub', False)
+
+def responseSize(response):
+    """
+    Function for estimating the memory used by a response in bytes
+    """
+    size = sys.getsizeof(response)
+    for rows in (getattr(response, 'poles', []), getattr(response, 'zeros', []), getattr(response, 'fap', [])):
+        size += sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
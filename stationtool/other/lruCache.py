@@ -0,0 +1,74 @@
+"""
+This module contains a small least recently used cache used by the StationTool Program
+"""
+import threading
+from collections import OrderedDict
+
+class LruCache(object):
+    """
+    Dictionary like cache that drops the least recently used entries when capacity is exceeded. If max_bytes is given, entries are also dropped while the combined size_function of the entries is larger than max_bytes.
+    """
+    def __init__(self, capacity, max_bytes = None, size_function = None):
+        if capacity < 1:
+            raise Exception("ERROR: Cache capacity has to be at least 1, received {0}".format(capacity))
+        if max_bytes is not None and size_function is None:
+            raise Exception("ERROR: Cache with a byte budget needs a size_function")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.size_function = size_function
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default = None):
+        """
+        Function for getting a cached value and marking it as recently used
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """
+        Function for storing a value to the cache
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = value
+            if self.size_function is not None:
+                self._sizes[key] = self.size_function(value)
+                self.used_bytes += self._sizes[key]
+
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+
+            if self.max_bytes is not None:
+                while self.used_bytes > self.max_bytes and len(self._entries) > 1:
+                    self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        """
+        Function for dropping a single entry
+        """
+        del self._entries[key]
+        self.used_bytes -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        """
+        Function for dropping all cached values
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.used_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,156 @@
+"""
+This module contains the instrumentation of the database calls of the StationTool Program
+"""
+import time
+import threading
+import inspect
+from collections import deque
+from functools import wraps
+
+def countRows(result):
+    """
+    Function for counting the rows returned by a database call. Tuples of lists such as selection closures are counted by their combined length.
+    """
+    if result is None:
+        return 0
+    if isinstance(result, tuple):
+        return sum(len(r) for r in result if isinstance(r, (list, tuple, set)))
+    if isinstance(result, (list, set, dict)):
+        return len(result)
+    return 1
+
+class QueryCall(object):
+    """
+    Measurements of a single database call in progress
+    """
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.rows = 0
+        self.acquire_time = 0.0
+
+class QueryStats(object):
+    """
+    Class for collecting call counts, wall times, returned rows and connection acquisition times of database calls. Calls slower than slow_query_threshold seconds are printed and kept in a bounded slow query log.
+    """
+    def __init__(self, slow_query_threshold = 0.5, slow_query_log_size = 200):
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_queries = deque(maxlen = slow_query_log_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+
+    def _callStack(self):
+        """
+        Function for getting the stack of calls in progress on the current thread
+        """
+        if not hasattr(self._local, 'calls'):
+            self._local.calls = []
+        return self._local.calls
+
+    def begin(self, name):
+        """
+        Function for starting the measurement of a call
+        """
+        call = QueryCall(name)
+        self._callStack().append(call)
+        return call
+
+    def end(self, call, failed = False):
+        """
+        Function for finishing the measurement of a call and adding it to the statistics
+        """
+        stack = self._callStack()
+        if call in stack:
+            stack.remove(call)
+
+        wall_time = time.time() - call.start
+
+        with self._lock:
+            entry = self._stats.setdefault(call.name, {
+                'calls':0, 'errors':0, 'total_time':0.0, 'max_time':0.0, 'rows':0, 'acquire_time':0.0
+            })
+            entry['calls'] += 1
+            entry['total_time'] += wall_time
+            entry['max_time'] = max(entry['max_time'], wall_time)
+            entry['rows'] += call.rows
+            entry['acquire_time'] += call.acquire_time
+            if failed:
+                entry['errors'] += 1
+
+            if wall_time >= self.slow_query_threshold:
+                self.slow_queries.append((call.name, call.start, wall_time, call.rows, call.acquire_time))
+
+        if wall_time >= self.slow_query_threshold:
+            print("Slow database call {0}: {1:.3f}s, {2} rows, {3:.3f}s waiting for a connection".format(call.name, wall_time, call.rows, call.acquire_time))
+
+    def addAcquireTime(self, seconds):
+        """
+        Function for adding connection acquisition time to the innermost call in progress on the current thread
+        """
+        stack = self._callStack()
+        if stack:
+            stack[-1].acquire_time += seconds
+
+    def summary(self):
+        """
+        Function for getting a dictionary of statistics for every measured call name
+        """
+        with self._lock:
+            summary = {}
+            for name, entry in self._stats.items():
+                summary[name] = dict(entry)
+                summary[name]['mean_time'] = entry['total_time'] / entry['calls']
+            return summary
+
+    def getSlowQueries(self):
+        """
+        Function for getting the slow query log as a list of (name, start, wall_time, rows, acquire_time) tuples
+        """
+        with self._lock:
+            return list(self.slow_queries)
+
+    def reset(self):
+        """
+        Function for clearing all statistics and the slow query log
+        """
+        with self._lock:
+            self._stats = {}
+            self.slow_queries.clear()
+
+def instrumented(function):
+    """
+    Decorator for measuring a DatabaseApi method with the query_stats of its object. Generator methods are measured until they are exhausted or closed.
+    """
+    name = function.__name__
+
+    if inspect.isgeneratorfunction(function):
+        @wraps(function)
+        def streamWrapper(self, *args, **kwargs):
+            call = self.query_stats.begin(name)
+            failed = False
+            try:
+                for chunk in function(self, *args, **kwargs):
+                    call.rows += countRows(chunk)
+                    yield chunk
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self.query_stats.end(call, failed)
+        return streamWrapper
+
+    @wraps(function)
+    def wrapper(self, *args, **kwargs):
+        call = self.query_stats.begin(name)
+        failed = False
+        try:
+            result = function(self, *args, **kwargs)
+            call.rows = countRows(result)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.query_stats.end(call, failed)
+    return wrapper
@@ -1,10 +1,11 @@
 """
 This module contains an object for managing data row selection policies and passing them across the application
 """
+from collections import Counter
 
 class SelectionManager(object):
     """
-    Object for managing selections across the application
+    Object for managing selections across the application. The closure of every selected id of the active field is resolved once and kept, and the other selections are the union of these contributions. Adding an id resolves only that id and removing one subtracts only the ids no other selected id contributes. The inventory active at the selected date is kept as one more contribution that is unioned into every field, including the active one.
     """
     NONE = 0
     STATION = 1
@@ -12,7 +13,14 @@ class SelectionManager(object):
     SENSOR = 3
     INSTRUMENT = 4
 
-    def __init__(self, databaseApi):
+    FIELD_KINDS = {
+        STATION:'station',
+        SITECHAN:'sitechan',
+        SENSOR:'sensor',
+        INSTRUMENT:'instrument'
+    }
+
+    def __init__(self, databaseApi, databaseWorker = None):
         self._selected_date = None
         self._selected_stations = []
         self._selected_sitechans = []
@@ -20,6 +28,40 @@ class SelectionManager(object):
         self._selected_instruments = []
         self._active_selection = self.NONE
         self._databaseApi = databaseApi
+        self._databaseWorker = databaseWorker
+        self._selection_listeners = []
+        self._closure_generation = 0
+        self._closure_contributions = {}
+        self._closure_counts = [Counter(), Counter(), Counter(), Counter()]
+        self._pending_selection_keys = set()
+        self._explicit_ids = []
+        self._active_inventory_selected = False
+
+    def addSelectionListener(self, listener):
+        """
+        Add a function that is called whenever a selection resolved in the background has been applied
+        """
+        self._selection_listeners.append(listener)
+
+    def _cancelPendingSelection(self):
+        """
+        Function for dropping the closures that are still being resolved in the background
+        """
+        if self._databaseWorker is not None:
+            for key in self._pending_selection_keys:
+                self._databaseWorker.cancel(key)
+        self._pending_selection_keys = set()
+
+    def _resetSelectionClosure(self):
+        """
+        Function for forgetting the closure contributions of all selected ids and the active inventory
+        """
+        self._cancelPendingSelection()
+        self._closure_generation += 1
+        self._closure_contributions = {}
+        self._closure_counts = [Counter(), Counter(), Counter(), Counter()]
+        self._explicit_ids = []
+        self._active_inventory_selected = False
 
     def selectField(self, field):
         """
@@ -31,6 +73,183 @@ class SelectionManager(object):
             self.clearAll()
             self._active_selection = field
 
+    def _selectionKey(self, field, selected_id):
+        """
+        Function for getting the database worker key of the closure of a single selected id
+        """
+        return 'selection-{0}-{1}'.format(self.FIELD_KINDS[field], selected_id)
+
+    def _addToSelectionClosure(self, field, selected_id):
+        """
+        Function for resolving the closure of a single newly selected id of field and adding it to the other selections. With a database worker the closure is resolved in the background.
+        """
+        if selected_id not in self._explicit_ids:
+            self._explicit_ids.append(selected_id)
+
+        if self._databaseWorker is None:
+            closure = self._databaseApi.resolveSelectionClosure(self.FIELD_KINDS[field], [selected_id], self._selected_date)
+            self._addClosureContribution(field, selected_id, closure)
+        else:
+            key = self._selectionKey(field, selected_id)
+            generation = self._closure_generation
+            self._pending_selection_keys.add(key)
+            self._databaseWorker.submit(key,
+                                        self._databaseApi.resolveSelectionClosure,
+                                        (self.FIELD_KINDS[field], [selected_id], self._selected_date),
+                                        lambda closure: self._applyAsyncClosureContribution(field, selected_id, generation, key, closure),
+                                        interactive = True)
+
+    def _addClosureContribution(self, field, selected_id, closure):
+        """
+        Function for counting the ids related to selected_id and taking the new union into use
+        """
+        if selected_id in self._closure_contributions:
+            return
+
+        self._closure_contributions[selected_id] = closure
+        for counts, ids in zip(self._closure_counts, closure):
+            counts.update(ids)
+
+        self._applyClosureCounts(field)
+
+    def _removeFromSelectionClosure(self, field, selected_id):
+        """
+        Function for removing the contribution of a deselected id of field. Only the related ids that no other selected id contributes are removed from the other selections.
+        """
+        if selected_id in self._explicit_ids:
+            self._explicit_ids.remove(selected_id)
+
+        closure = self._closure_contributions.pop(selected_id, None)
+        if closure is None:
+            key = self._selectionKey(field, selected_id)
+            if key in self._pending_selection_keys:
+                self._pending_selection_keys.discard(key)
+                self._databaseWorker.cancel(key)
+            return
+
+        for counts, ids in zip(self._closure_counts, closure):
+            counts.subtract(ids)
+            for related_id in set(ids):
+                if counts[related_id] <= 0:
+                    del counts[related_id]
+
+        self._applyClosureCounts(field)
+
+    def _reresolveSelectionClosure(self):
+        """
+        Function for resolving the selection again after the selected date has changed. The active inventory is requested once for the new date and only the ids that have been selected explicitly are resolved one by one. Ids selected only because they were active at the old date are dropped.
+        """
+        field = self._active_selection
+        explicit_ids = list(self._explicit_ids)
+        active_inventory_selected = self._active_inventory_selected
+
+        self._resetSelectionClosure()
+        self._getFieldSelection(field)[:] = explicit_ids
+        self._applyClosureCounts(field)
+
+        if active_inventory_selected and self._selected_date is not None:
+            self._requestActiveInventory()
+        for selected_id in explicit_ids:
+            self._addToSelectionClosure(field, selected_id)
+
+    def _notifySelectionListeners(self):
+        """
+        Function for notifying the selection listeners that the selection has changed
+        """
+        for listener in self._selection_listeners:
+            listener()
+
+    def _applyClosureCounts(self, field):
+        """
+        Function for taking the union of the closure contributions into use
+        """
+        self._applySelectionClosure(field, [list(counts) for counts in self._closure_counts])
+
+    def _getFieldSelection(self, field):
+        """
+        Function for getting the list of selected ids of field
+        """
+        return {
+            self.STATION:self._selected_stations,
+            self.SITECHAN:self._selected_sitechans,
+            self.SENSOR:self._selected_sensors,
+            self.INSTRUMENT:self._selected_instruments
+        }[field]
+
+    def _applySelectionClosure(self, field, closure):
+        """
+        Function for taking a resolved closure into use. The selection of field itself is left as it is.
+        """
+        if field != self.STATION:
+            self._selected_stations = closure[0]
+        if field != self.SITECHAN:
+            self._selected_sitechans = closure[1]
+        if field != self.SENSOR:
+            self._selected_sensors = closure[2]
+        if field != self.INSTRUMENT:
+            self._selected_instruments = closure[3]
+
+    def _applyAsyncClosureContribution(self, field, selected_id, generation, key, closure):
+        """
+        Function for adding a closure resolved in the background and notifying the selection listeners. Closures of ids that have been deselected or cleared meanwhile are dropped.
+        """
+        self._pending_selection_keys.discard(key)
+        if generation != self._closure_generation or selected_id not in self._getFieldSelection(field):
+            return
+
+        self._addClosureContribution(field, selected_id, closure)
+        self._notifySelectionListeners()
+
+    def _selectActiveInventory(self):
+        """
+        Function for selecting everything that is active at the selected date. The active inventory is kept as a contribution of its own, so ids added to the selection afterwards are unioned with it.
+        """
+        self._resetSelectionClosure()
+        self._requestActiveInventory()
+
+    def _requestActiveInventory(self):
+        """
+        Function for resolving the active inventory of the selected date and adding it to the selection. With a database worker it is resolved in the background.
+        """
+        self._active_inventory_selected = True
+
+        if self._databaseWorker is None:
+            self._addActiveInventory(self._databaseApi.getActiveInventory(self._selected_date))
+        else:
+            key = 'selection-active-inventory'
+            generation = self._closure_generation
+            self._pending_selection_keys.add(key)
+            self._databaseWorker.submit(key,
+                                        self._databaseApi.getActiveInventory,
+                                        (self._selected_date,),
+                                        lambda snapshot: self._applyAsyncActiveInventory(generation, key, snapshot),
+                                        interactive = True)
+
+    def _addActiveInventory(self, snapshot):
+        """
+        Function for adding the active inventory of the selected date as a closure contribution. The active ids are also unioned into the selection of the active field, so the result is the same whether the field was made active before or after the inventory was resolved.
+        """
+        field = self._active_selection
+        closure = (snapshot.stations, snapshot.sitechans, snapshot.sensors, snapshot.instruments)
+
+        if field != self.NONE:
+            selection = self._getFieldSelection(field)
+            selected = set(selection)
+            selection.extend(active_id for active_id in closure[field - 1] if active_id not in selected)
+
+        self._addClosureContribution(field, None, closure)
+
+    def _applyAsyncActiveInventory(self, generation, key, snapshot):
+        """
+        Function for adding an active inventory resolved in the background and notifying the selection listeners. Inventories of a date that is no longer selected are dropped.
+        """
+        self._pending_selection_keys.discard(key)
+        if generation != self._closure_generation:
+            return
+
+        self._addActiveInventory(snapshot)
+        self._notifySelectionListeners()
+
     def getSelectedDate(self):
         """
         Get selected date
@@ -43,10 +262,9 @@ class SelectionManager(object):
         """
         self._selected_date = new_date
         if self._active_selection is self.NONE:
-            self._selected_stations = self._databaseApi.getStationIds(self._selected_date)
-            self._selected_sitechans = self._databaseApi.getSitechanIds(self._selected_date)
-            self._selected_sensors = self._databaseApi.getSensorIds(self._selected_date)
-            self._selected_instruments = self._databaseApi.getInstrumentIds(self._selected_date)
+            self._selectActiveInventory()
+        else:
+            self._reresolveSelectionClosure()
 
     def clearDate(self):
         """
@@ -54,10 +272,13 @@ class SelectionManager(object):
         """
         self._selected_date = None
         if self._active_selection is self.NONE:
+            self._resetSelectionClosure()
             self._selected_stations = []
             self._selected_sitechans = []
             self._selected_sensors = []
             self._selected_instruments = []
+        else:
+            self._reresolveSelectionClosure()
 
     def getSelectedStations(self):
         """
@@ -69,11 +290,10 @@ class SelectionManager(object):
         """
         Select a new station
         """
+        self._resetSelectionClosure()
         self._selected_stations = [station_id]
 
-        self._selected_sitechans = self._databaseApi.getSitechanIdsFromStations(self._selected_stations, self._selected_date)
-        self._selected_sensors = self._databaseApi.getSensorIdsFromStations(self._selected_stations, self._selected_date)
-        self._selected_instruments = self._databaseApi.getInstrumentIdsFromStations(self._selected_stations, self._selected_date)
+        self._addToSelectionClosure(self.STATION, station_id)
 
     def addStationToSelection(self, station_id):
         """
@@ -84,9 +304,19 @@ class SelectionManager(object):
         if station_id not in self._selected_stations:
             self._selected_stations.append(station_id)
 
-            self._selected_sitechans = self._databaseApi.getSitechanIdsFromStations(self._selected_stations, self._selected_date)
-            self._selected_sensors = self._databaseApi.getSensorIdsFromStations(self._selected_stations, self._selected_date)
-            self._selected_instruments = self._databaseApi.getInstrumentIdsFromStations(self._selected_stations, self._selected_date)
+            self._addToSelectionClosure(self.STATION, station_id)
+
+    def removeStationFromSelection(self, station_id):
+        """
+        Remove a station id from current selection. Returns False if the id was not selected.
+        """
+        if self._active_selection != self.STATION or station_id not in self._selected_stations:
+            return False
+
+        self._selected_stations.remove(station_id)
+        self._removeFromSelectionClosure(self.STATION, station_id)
+        self._notifySelectionListeners()
+        return True
 
     def getSelectedSitechans(self):
         """
@@ -98,11 +328,10 @@ class SelectionManager(object):
         """
         Select a new sitechan
         """
+        self._resetSelectionClosure()
         self._selected_sitechans = [sitechan_id]
 
-        self._selected_stations = self._databaseApi.getStationIdsFromSitechans(self._selected_sitechans, self._selected_date)
-        self._selected_sensors = self._databaseApi.getSensorIdsFromSitechans(self._selected_sitechans, self._selected_date)
-        self._selected_instruments = self._databaseApi.getInstrumentIdsFromSitechans(self._selected_sitechans, self._selected_date)
+        self._addToSelectionClosure(self.SITECHAN, sitechan_id)
 
     def addSitechanToSelection(self, sitechan_id):
         """
@@ -113,9 +342,19 @@ class SelectionManager(object):
         if sitechan_id not in self._selected_sitechans:
             self._selected_sitechans.append(sitechan_id)
 
-            self._selected_stations = self._databaseApi.getStationIdsFromSitechans(self._selected_sitechans, self._selected_date)
-            self._selected_sensors = self._databaseApi.getSensorIdsFromSitechans(self._selected_sitechans, self._selected_date)
-            self._selected_instruments = self._databaseApi.getInstrumentIdsFromSitechans(self._selected_sitechans, self._selected_date)
+            self._addToSelectionClosure(self.SITECHAN, sitechan_id)
+
+    def removeSitechanFromSelection(self, sitechan_id):
+        """
+        Remove a sitechan id from current selection. Returns False if the id was not selected.
+        """
+        if self._active_selection != self.SITECHAN or sitechan_id not in self._selected_sitechans:
+            return False
+
+        self._selected_sitechans.remove(sitechan_id)
+        self._removeFromSelectionClosure(self.SITECHAN, sitechan_id)
+        self._notifySelectionListeners()
+        return True
 
     def getSelectedInstruments(self):
         """
@@ -127,11 +366,10 @@ class SelectionManager(object):
         """
         Select a new instrument
         """
+        self._resetSelectionClosure()
         self._selected_instruments = [instrument_id]
 
-        self._selected_stations = self._databaseApi.getStationIdsFromInstruments(self._selected_instruments, self._selected_date)
-        self._selected_sitechans = self._databaseApi.getSitechanIdsFromInstruments(self._selected_instruments, self._selected_date)
-        self._selected_sensors = self._databaseApi.getSensorIdsFromInstruments(self._selected_instruments, self._selected_date)
+        self._addToSelectionClosure(self.INSTRUMENT, instrument_id)
 
     def addInstrumentToSelection(self, instrument_id):
         """
@@ -142,9 +380,19 @@ class SelectionManager(object):
         if instrument_id not in self._selected_instruments:
             self._selected_instruments.append(instrument_id)
 
-            self._selected_stations = self._databaseApi.getStationIdsFromInstruments(self._selected_instruments, self._selected_date)
-            self._selected_sitechans = self._databaseApi.getSitechanIdsFromInstruments(self._selected_instruments, self._selected_date)
-            self._selected_sensors = self._databaseApi.getSensorIdsFromInstruments(self._selected_instruments, self._selected_date)
+            self._addToSelectionClosure(self.INSTRUMENT, instrument_id)
+
+    def removeInstrumentFromSelection(self, instrument_id):
+        """
+        Remove an instrument id from current selection. Returns False if the id was not selected.
+        """
+        if self._active_selection != self.INSTRUMENT or instrument_id not in self._selected_instruments:
+            return False
+
+        self._selected_instruments.remove(instrument_id)
+        self._removeFromSelectionClosure(self.INSTRUMENT, instrument_id)
+        self._notifySelectionListeners()
+        return True
 
     def getSelectedSensors(self):
         """
@@ -156,10 +404,10 @@ class SelectionManager(object):
         """
         Select a new sensor
         """
+        self._resetSelectionClosure()
         self._selected_sensors = [sensor_id]
-        self._selected_stations = self._databaseApi.getStationIdsFromSensors(self._selected_sensors, self._selected_date)
-        self._selected_sitechans = self._databaseApi.getSitechanIdsFromSensors(self._selected_sensors, self._selected_date)
-        self._selected_instruments = self._databaseApi.getInstrumentIdsFromSensors(self._selected_sensors, self._selected_date)
+
+        self._addToSelectionClosure(self.SENSOR, sensor_id)
 
     def addSensorToSelection(self, sensor_id):
         """
@@ -167,31 +415,33 @@ class SelectionManager(object):
         """
         self.selectField(self.SENSOR)
 
-        print("add sensor if not in list")
         if sensor_id not in self._selected_sensors:
             self._selected_sensors.append(sensor_id)
 
-            print("fetching stations from database")
-            self._selected_stations = self._databaseApi.getStationIdsFromSensors(self._selected_sensors, self._selected_date)
-            print("fetching sitechans")
-            self._selected_sitechans = self._databaseApi.getSitechanIdsFromSensors(self._selected_sensors, self._selected_date)
-            print("fetching instruments")
-            self._selected_instruments = self._databaseApi.getInstrumentIdsFromSensors(self._selected_sensors, self._selected_date)
-            print("done!")
+            self._addToSelectionClosure(self.SENSOR, sensor_id)
+
+    def removeSensorFromSelection(self, sensor_id):
+        """
+        Remove a sensor id from current selection. Returns False if the id was not selected.
+        """
+        if self._active_selection != self.SENSOR or sensor_id not in self._selected_sensors:
+            return False
+
+        self._selected_sensors.remove(sensor_id)
+        self._removeFromSelectionClosure(self.SENSOR, sensor_id)
+        self._notifySelectionListeners()
+        return True
 
     def clearAll(self):
         """
         Clear all fields, except for selected_date
         """
         self._active_selection = self.NONE
+        self._resetSelectionClosure()
+        self._selected_stations = []
+        self._selected_sitechans = []
+        self._selected_sensors = []
+        self._selected_instruments = []
         if self._selected_date is not None:
-            self._selected_stations = self._databaseApi.getStationIds(self._selected_date)
-            self._selected_sitechans = self._databaseApi.getSitechanIds(self._selected_date)
-            self._selected_sensors = self._databaseApi.getSensorIds(self._selected_date)
-            self._selected_instruments = self._databaseApi.getInstrumentIds(self._selected_date)
-        else:
-            self._selected_stations = []
-            self._selected_sitechans = []
-            self._selected_sensors = []
-            self._selected_instruments = []
+            self._selectActiveInventory()
 
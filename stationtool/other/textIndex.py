@@ -0,0 +1,168 @@
+"""
+This module contains the in-memory inverted index used for filtering the tables of the StationTool Program
+"""
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+GRAM_LENGTH = 3
+
+def parseRange(text):
+    """
+    Function for parsing a numeric range typed to a filter. Accepts a single value or a range written as low..high where either end may be left empty. Returns a tuple of the low and high bounds with None for an open end.
+    """
+    if '..' not in text:
+        value = float(text)
+        return value, value
+
+    low, high = text.split('..', 1)
+    low = float(low) if low.strip() else None
+    high = float(high) if high.strip() else None
+    return low, high
+
+class TextIndex(object):
+    """
+    Inverted index from the values of the text and numeric columns of a table to the ids of the rows. Text values are indexed by their lower case trigrams for substring queries and kept in sorted order for prefix queries, and numeric values are kept in sorted arrays for range queries. The sorted structures are rebuilt only after rows have changed, so repeated queries while the user types do not scan the table.
+    """
+    def __init__(self, text_columns, numeric_columns = ()):
+        self.text_columns = list(text_columns)
+        self.numeric_columns = list(numeric_columns)
+        self.clear()
+
+    def clear(self):
+        """
+        Function for removing all rows from the index
+        """
+        self._values = dict((col, {}) for col in self.text_columns)
+        self._grams = dict((col, defaultdict(set)) for col in self.text_columns)
+        self._sorted_values = dict((col, None) for col in self.text_columns)
+        self._numbers = dict((col, {}) for col in self.numeric_columns)
+        self._sorted_numbers = dict((col, None) for col in self.numeric_columns)
+
+    def _gramsOf(self, value):
+        """
+        Function for getting the set of trigrams of a lower case value
+        """
+        return set(value[i:i + GRAM_LENGTH] for i in range(len(value) - GRAM_LENGTH + 1))
+
+    def addRow(self, row_id, row):
+        """
+        Function for adding a single row to the index
+        """
+        for col in self.text_columns:
+            if row[col] is None:
+                continue
+            value = str(row[col]).lower()
+            self._values[col][row_id] = value
+            for gram in self._gramsOf(value):
+                self._grams[col][gram].add(row_id)
+            self._sorted_values[col] = None
+
+        for col in self.numeric_columns:
+            if row[col] is None:
+                continue
+            self._numbers[col][row_id] = float(row[col])
+            self._sorted_numbers[col] = None
+
+    def addRows(self, rows):
+        """
+        Function for adding many rows whose first column is the id of the row
+        """
+        for row in rows:
+            self.addRow(row[0], row)
+
+    def removeRow(self, row_id):
+        """
+        Function for removing a single row from the index
+        """
+        for col in self.text_columns:
+            value = self._values[col].pop(row_id, None)
+            if value is None:
+                continue
+            for gram in self._gramsOf(value):
+                ids = self._grams[col][gram]
+                ids.discard(row_id)
+                if not ids:
+                    del self._grams[col][gram]
+            self._sorted_values[col] = None
+
+        for col in self.numeric_columns:
+            if self._numbers[col].pop(row_id, None) is not None:
+                self._sorted_numbers[col] = None
+
+    def updateRow(self, old_id, row):
+        """
+        Function for replacing the indexed values of a row after it has changed
+        """
+        self.removeRow(old_id)
+        self.addRow(row[0], row)
+
+    def _textColumns(self, col):
+        """
+        Function for getting the columns a text query is run against. None means all text columns.
+        """
+        if col is None:
+            return self.text_columns
+        if col not in self._values:
+            raise Exception("ERROR: Column {0} is not a text column of the index".format(col))
+        return [col]
+
+    def prefix(self, col, text):
+        """
+        Function for getting the ids of the rows whose value in column col starts with text. Case is ignored.
+        """
+        text = text.lower()
+        ids = set()
+
+        for c in self._textColumns(col):
+            if self._sorted_values[c] is None:
+                self._sorted_values[c] = sorted((value, row_id) for row_id, value in self._values[c].items())
+            sorted_values = self._sorted_values[c]
+
+            i = bisect_left(sorted_values, (text,))
+            while i < len(sorted_values) and sorted_values[i][0].startswith(text):
+                ids.add(sorted_values[i][1])
+                i += 1
+
+        return ids
+
+    def contains(self, col, text):
+        """
+        Function for getting the ids of the rows whose value in column col contains text. Case is ignored. Texts shorter than a trigram are matched by scanning the values of the column.
+        """
+        text = text.lower()
+        ids = set()
+
+        for c in self._textColumns(col):
+            values = self._values[c]
+
+            if len(text) < GRAM_LENGTH:
+                ids.update(row_id for row_id, value in values.items() if text in value)
+                continue
+
+            grams = sorted((self._grams[c].get(gram, set()) for gram in self._gramsOf(text)), key = len)
+            candidates = set(grams[0]).intersection(*grams[1:])
+            ids.update(row_id for row_id in candidates if text in values[row_id])
+
+        return ids
+
+    def inRange(self, col, low = None, high = None):
+        """
+        Function for getting the ids of the rows whose value in numeric column col is between low and high inclusive. None leaves that end open.
+        """
+        if col not in self._numbers:
+            raise Exception("ERROR: Column {0} is not a numeric column of the index".format(col))
+
+        if self._sorted_numbers[col] is None:
+            numbers = self._numbers[col]
+            ids = np.fromiter(numbers.keys(), dtype = np.int64, count = len(numbers))
+            values = np.fromiter(numbers.values(), dtype = np.float64, count = len(numbers))
+            order = np.argsort(values, kind = 'stable')
+            self._sorted_numbers[col] = (values[order], ids[order])
+        values, ids = self._sorted_numbers[col]
+
+        first = 0 if low is None else np.searchsorted(values, low, side = 'left')
+        last = len(values) if high is None else np.searchsorted(values, high, side = 'right')
+
+        return set(ids[first:last].tolist())
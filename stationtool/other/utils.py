@@ -6,6 +6,8 @@ import datetime
 import pyproj
 from PyQt5.QtCore import QDate, QDateTime, QTime
 
+from other.inventoryGraph import OPEN_SENSOR_ENDTIME
+
 
 def datetime2DateOrNone(value):
     """
@@ -72,6 +74,23 @@ def datetime2QDateTime(date_val):
     return QDateTime(QDate(date_val.year, date_val.month, date_val.day),
                      QTime(date_val.hour, date_val.minute, date_val.second, date_val.microsecond/1000))
 
+def date2String(date_val):
+    """
+    Function for formatting a date for display in the tables
+    """
+    return date_val.strftime("%d/%m/%Y")
+
+def epoch2String(epoch_val):
+    """
+    Function for formatting an epoch time in seconds for display in the tables. The end time of a sensor that is still open is shown as "open" and other times that do not fit in a datetime are shown as numbers.
+    """
+    if epoch_val == OPEN_SENSOR_ENDTIME:
+        return "open"
+    try:
+        return (datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds = epoch_val)).strftime("%d/%m/%Y %H:%M:%S.%f")[:-3]
+    except (OverflowError, ValueError):
+        return str(epoch_val)
+
 def fromTM35FINToMap(x, y):
     """
     Function for moving from TM35FIN coordinates into the coordinates of the
@@ -1,11 +1,13 @@
 from PyQt5.QtWidgets import (   QMainWindow, QAction, QWidget, QHBoxLayout,
                                 qApp)
 from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QTimer
 
 from dataViewer.dataViewWidget import DataViewWidget
 from mapViewer.mapViewerWidget import SidePanelWidget
 from other.databaseAPI import DatabaseApi
 from other.selectionManager import SelectionManager
+from other.databaseWorker import DatabaseWorker
 """
 This module contains the MainWindow class of the StationTool program.
 The StationTool class will have all the functionality of the program inside of
@@ -52,11 +54,14 @@ class StationToolWidget(QWidget):
     def __init__(self, parent):
         super(QWidget, self).__init__(parent)
         self.database_api = DatabaseApi()
-        self.selection_manager = SelectionManager(self.database_api)
-        self.data_view_widget = DataViewWidget(self, self.database_api, self.selection_manager)
+        self.database_worker = DatabaseWorker(self)
+        qApp.aboutToQuit.connect(self.database_worker.shutdown)
+        qApp.aboutToQuit.connect(self.database_api.close)
+        self.selection_manager = SelectionManager(self.database_api, self.database_worker)
+        self.selection_manager.addSelectionListener(self.updateSelectionViews)
+        self.data_view_widget = DataViewWidget(self, self.database_api, self.selection_manager, self.database_worker)
         self.side_panel_widget = SidePanelWidget(self, self.selection_manager)
-
-        self.side_panel_widget.addStations(self.database_api.getStations())
+        self.map_requested = False
 
         self.layout = QHBoxLayout(self)
         self.layout.addWidget(self.data_view_widget)
@@ -64,6 +69,38 @@ class StationToolWidget(QWidget):
 
         self.setLayout(self.layout)
 
+    def showEvent(self, event):
+        """
+        Overridden showEvent for requesting the stations of the map after the first paint. The database worker runs one request at a time, so the map is queued behind the request of the visible tab and does not delay its first rows.
+        """
+        QWidget.showEvent(self, event)
+        if not self.map_requested:
+            self.map_requested = True
+            QTimer.singleShot(0, self.loadMapStations)
+
+    def loadMapStations(self):
+        """
+        Function for requesting the stations of the map from the database worker
+        """
+        self.database_worker.submit('map-stations', self.database_api.loadInventory, callback = self.addStationsToMap)
+
+    def addStationsToMap(self, stations):
+        """
+        Function for passing the stations fetched from the database to the map and the date slider
+        """
+        self.side_panel_widget.addStations(stations)
+
+        date_range = self.database_api.getInventoryDateRange()
+        if date_range is not None:
+            self.side_panel_widget.selection_screen.setDateRange(date_range[0], date_range[1])
+
+    def updateSelectionViews(self):
+        """
+        Function for updating the tables and the map after a selection has been resolved
+        """
+        self.data_view_widget.updateAllTabViews()
+        self.side_panel_widget.updateMapView()
+
     def updateDataViewWidget(self):
         """
         Function for updating dataViewWidget
@@ -81,3 +118,4 @@ class StationToolWidget(QWidget):
         Function for calling data_view_widgets clearSelectionFields function
         """
         self.data_view_widget.clearSelectionFields()
+        self.side_panel_widget.updateMapView()